@@ -1,17 +1,29 @@
 '''
 Compare relationship between two people between two series (naruto and shippuden)
 '''
-from DataCollection import Anime
 from data.Constants import JJK, NARUTO
 from Network import Anime_Network
-import community as community_louvain
-import matplotlib.pyplot as plt
-import networkx as nx
-import pandas as pd
+from Communities import consensus_partition, graph_fingerprint, partition_modularity, run_louvain_ensemble
+from Profiling import PROFILER, profiled
+import numpy as np
 
 
 class Analysis:
-    def __init__(self, anime, save_preprocessing=False):
+    def __init__(self, anime, save_preprocessing=False, network=None):
+        # Community results cached per graph fingerprint and parameters
+        self._community_cache = {}
+        self._fingerprint = (None, None)
+        # BFS distance profile and weighted degrees of the last graph they were computed for
+        self._distances = (None, None)
+        self._popularity = (None, None)
+
+        # Use an already built network when one is given
+        if network is not None:
+            self.network = network
+            if not self.network.graph:
+                raise ValueError("Network graph not initialized correctly.")
+            return
+
         # Initialize Network and load or build the graph
         self.network = Anime_Network(anime)
 
@@ -24,33 +36,37 @@ class Analysis:
             self.network.network()
         
         # Ensure the network is loaded
-        if not self.network.anime_network:
+        if not self.network.graph:
             raise ValueError("Network graph not initialized correctly.")
     
+    @profiled("Analysis.cutoff_val")
     def cutoff_val(self):
         return self.network.cutoff_weight
 
+    @profiled("Analysis.cutoff_percentage")
     def cutoff_percentage(self):
         return self.network.percentage_removed
 
+    @profiled("Analysis.popularity_score")
     def popularity_score(self, character):
-        if character not in self.network.anime_network:
+        if character not in self.network.graph:
             raise ValueError(f"Character '{character}' not found in the network.")
         
-        # Sum up the weights of all edges connected to the character
-        return sum(
-            d["weight"] for _, _, d in self.network.anime_network.edges(character, data=True)
-        )
-
+        # Sum up the weights of all edges connected to the character, for every character at once
+        graph = self.network.graph
+        cached_graph, popularity = self._popularity
+        if cached_graph is not graph:
+            popularity = graph.weighted_degree()
+            self._popularity = (graph, popularity)
+        return float(popularity[graph.index[character]])
+
+    @profiled("Analysis.top_relationships")
     def top_relationships(self, character, top_n=3):
-        if character not in self.network.anime_network:
+        if character not in self.network.graph:
             raise ValueError(f"Character '{character}' not found in the network.")
         
         # Get all edges connected to the character
-        edges = [
-            (neighbor, data["weight"])
-            for _, neighbor, data in self.network.anime_network.edges(character, data=True)
-        ]
+        edges = self.network.graph.neighbors(character)
         
         # Sort by weight in descending order and take the top N
         return sorted(edges, key=lambda x: x[1], reverse=True)[:top_n]
@@ -61,37 +77,119 @@ class Analysis:
     def display_relationship(self):
         self.network.display_relationship()
 
-    def detect_communities(self):
-        if not self.network.anime_network:
+    def _graph_key(self):
+        graph = self.network.anime_network
+        cached_graph, fingerprint = self._fingerprint
+        if cached_graph is not graph:
+            fingerprint = graph_fingerprint(graph)
+            self._fingerprint = (graph, fingerprint)
+        return fingerprint
+
+    def _distance_profile(self):
+        """
+        Eccentricity, distance sum and reachable count of every character, from one bit-parallel
+        BFS over the CSR graph, cached until the graph changes.
+        """
+        graph = self.network.graph
+        cached_graph, profile = self._distances
+        if cached_graph is not graph:
+            profile = graph.distance_profile()
+            self._distances = (graph, profile)
+        return profile
+
+    def _require_connected(self, message="The network graph is not connected."):
+        eccentricity, totals, reached = self._distance_profile()
+        if len(reached) == 0 or reached.min() < len(reached):
+            raise ValueError(message)
+        return eccentricity, totals
+
+    @profiled("Analysis.community_ensemble")
+    def community_ensemble(self, runs=1, resolutions=(1.0,), seed=0, workers=None, threshold=0.5):
+        """
+        Detect communities with an ensemble of seeded Louvain passes for each resolution.
+
+        Passes run across a process pool and are merged into a consensus partition.
+        Results are cached per graph, so repeated calls with the same parameters are free.
+
+        Args:
+            runs (int): Number of seeded Louvain passes per resolution.
+            resolutions (Iterable[float]): Louvain resolution parameters.
+            seed (int): Base seed; pass i uses seed + i.
+            workers (int): Process pool size (default: number of CPUs).
+            threshold (float): Minimum co-association kept when building the consensus.
+
+        Returns:
+            Dict[float, dict]: For each resolution, a dict with the consensus `partition`,
+                               per-node `stability` (0 to 1) and the partition's `modularity`.
+        """
+        if not self.network.graph:
             raise ValueError("Network graph not initialized.")
-        
-        # Compute the best partition using Louvain
-        partition = community_louvain.best_partition(self.network.anime_network)
-        return partition
 
-    def modularity(self):
+        graph_key = self._graph_key()
+        keys = {resolution: (graph_key, resolution, runs, seed, threshold) for resolution in resolutions}
+        missing = [resolution for resolution, key in keys.items() if key not in self._community_cache]
+        PROFILER.count("community_cache_hits", len(keys) - len(missing))
+        PROFILER.count("community_cache_misses", len(missing))
+
+        if missing:
+            ensemble = run_louvain_ensemble(
+                self.network.anime_network, runs=runs, resolutions=missing, seed=seed, workers=workers
+            )
+            for resolution, partitions in ensemble.items():
+                partition, stability = consensus_partition(partitions, threshold=threshold, seed=seed)
+                self._community_cache[keys[resolution]] = {
+                    "partition": partition,
+                    "stability": stability,
+                    "modularity": partition_modularity(partition, self.network.anime_network, resolution),
+                }
+
+        return {resolution: self._community_cache[key] for resolution, key in keys.items()}
+
+    @profiled("Analysis.detect_communities")
+    def detect_communities(self, runs=1, resolution=1.0, seed=0, workers=None):
+        """
+        Detect communities using seeded Louvain, as a consensus of `runs` passes.
+
+        Returns:
+            Dict[str, int]: Community index for each character.
+        """
+        return self.community_ensemble(runs, (resolution,), seed, workers)[resolution]["partition"]
+
+    @profiled("Analysis.community_stability")
+    def community_stability(self, runs=10, resolution=1.0, seed=0, workers=None):
+        """
+        Per-character stability of the consensus partition, i.e. how consistently each character
+        is grouped with the rest of its community across the ensemble.
+
+        Returns:
+            Dict[str, float]: Stability score (0 to 1) for each character.
+        """
+        return self.community_ensemble(runs, (resolution,), seed, workers)[resolution]["stability"]
+
+    @profiled("Analysis.modularity")
+    def modularity(self, runs=1, resolution=1.0, seed=0, workers=None):
         """
         Calculate the modularity score for the detected communities.
 
         Returns:
             float: The modularity score (0 to 1).
         """
-        if not self.network.anime_network:
+        if not self.network.graph:
             raise ValueError("Network graph not initialized.")
         
-        partition = self.detect_communities()
-        score = community_louvain.modularity(partition, self.network.anime_network)
-        return score
+        return self.community_ensemble(runs, (resolution,), seed, workers)[resolution]["modularity"]
 
-    def one_minus_modularity(self):
+    @profiled("Analysis.one_minus_modularity")
+    def one_minus_modularity(self, runs=1, resolution=1.0, seed=0, workers=None):
         """
         Calculate 1 - modularity.
 
         Returns:
             float: The complementary modularity score.
         """
-        return 1 - self.modularity()
+        return 1 - self.modularity(runs, resolution, seed, workers)
 
+    @profiled("Analysis.shortest_path")
     def shortest_path(self, char1, char2):
         """
         Calculate the shortest path and its length between two characters.
@@ -103,13 +201,15 @@ class Analysis:
         Returns:
             Tuple[List[str], int]: The shortest path and its length.
         """
-        if char1 not in self.network.anime_network or char2 not in self.network.anime_network:
+        if char1 not in self.network.graph or char2 not in self.network.graph:
             raise ValueError(f"One or both characters not found in the network.")
         
-        path = nx.shortest_path(self.network.anime_network, source=char1, target=char2)
-        length = nx.shortest_path_length(self.network.anime_network, source=char1, target=char2)
-        return path, length
+        path = self.network.graph.shortest_path(char1, char2)
+        if path is None:
+            raise ValueError(f"No path between '{char1}' and '{char2}'.")
+        return path, len(path) - 1
 
+    @profiled("Analysis.network_diameter")
     def network_diameter(self):
         """
         Calculate the diameter of the network (longest shortest path).
@@ -117,40 +217,22 @@ class Analysis:
         Returns:
             int: The network diameter.
         """
-        if not self.network.anime_network:
+        if not self.network.graph:
             raise ValueError("Network graph not initialized.")
         
-        diameter = nx.diameter(self.network.anime_network)
-        return diameter
+        eccentricity, _ = self._require_connected(
+            "The network graph is not connected, so no single diameter exists."
+        )
+        return int(eccentricity.max())
 
     def visualize_communities(self):
-        if not self.network.anime_network:
+        if not self.network.graph:
             raise ValueError("Network graph not initialized.")
-        
-        # Detect communities
-        partition = self.detect_communities()
-
-        # Assign colors to nodes based on their community
-        pos = nx.spring_layout(self.network.anime_network)  # Generate a layout for the graph
-        cmap = plt.get_cmap("viridis")
-        communities = set(partition.values())
-        colors = {node: cmap(community / max(communities)) for node, community in partition.items()}
-
-        # Draw the network with node colors based on communities
-        plt.figure(figsize=(15, 15))
-        nx.draw(
-            self.network.anime_network,
-            pos,
-            node_color=[colors[node] for node in self.network.anime_network.nodes()],
-            with_labels=True,
-            node_size=500,
-            font_size=8,
-            edge_color="gray",
-        )
 
-        plt.title("Louvain Community Detection", fontsize=16)
-        plt.show()
+        import Visualization
+        Visualization.visualize_communities(self.network.anime_network, self.detect_communities())
 
+    @profiled("Analysis.get_neighbors")
     def get_neighbors(self, character):
         """
         Get all neighbors of a character and their relationship values.
@@ -162,16 +244,13 @@ class Analysis:
             List[Tuple[str, float]]: A list of tuples where each tuple contains
                                     a neighbor and the weight of the edge (relationship value).
         """
-        if character not in self.network.anime_network:
+        if character not in self.network.graph:
             raise ValueError(f"Character '{character}' not found in the network.")
         
         # Retrieve all neighbors and their edge weights
-        neighbors = [
-            (neighbor, data["weight"])
-            for _, neighbor, data in self.network.anime_network.edges(character, data=True)
-        ]
-        return neighbors
+        return self.network.graph.neighbors(character)
 
+    @profiled("Analysis.longest_path")
     def longest_path(self):
         """
         Calculate the longest path (network diameter) and return the path, its length, 
@@ -181,28 +260,25 @@ class Analysis:
             Tuple[List[str], int, str, str]: A tuple containing the longest path (list of characters), 
                                             its length, and the two endpoint characters.
         """
-        if not self.network.anime_network:
+        if not self.network.graph:
             raise ValueError("Network graph not initialized.")
         
-        if not nx.is_connected(self.network.anime_network):
-            raise ValueError("The network graph is not connected, so no single diameter exists.")
-
-        # Find all-pairs shortest paths
-        all_pairs_shortest_paths = dict(nx.all_pairs_shortest_path(self.network.anime_network))
-        longest_path = []
-        max_length = 0
-        char1, char2 = None, None
-
-        # Iterate through all shortest paths to find the longest one
-        for source, paths in all_pairs_shortest_paths.items():
-            for target, path in paths.items():
-                if len(path) - 1 > max_length:  # Subtract 1 because length includes nodes, not edges
-                    max_length = len(path) - 1
-                    longest_path = path
-                    char1, char2 = path[0], path[-1]
-
-        return longest_path, max_length, char1, char2
+        eccentricity, _ = self._require_connected(
+            "The network graph is not connected, so no single diameter exists."
+        )
 
+        # The first character whose eccentricity is the diameter, and the first character that far from it
+        graph = self.network.graph
+        max_length = int(eccentricity.max())
+        if max_length == 0:
+            return [], 0, None, None
+        source = int(np.argmax(eccentricity))
+        distances, parents = graph.bfs(source)
+        target = int(np.argmax(distances == max_length))
+        longest_path = graph.shortest_path(graph.nodes[source], graph.nodes[target])
+        return longest_path, max_length, longest_path[0], longest_path[-1]
+
+    @profiled("Analysis.weighted_network_diameter")
     def weighted_network_diameter(self):
         """
         Calculate the weighted network diameter, which is 1 / network diameter.
@@ -213,6 +289,7 @@ class Analysis:
         diameter = self.network_diameter()
         return 1 / diameter if diameter > 0 else float("inf")
 
+    @profiled("Analysis.is_small_world_network")
     def is_small_world_network(self):
         """
         Check if the network is a small-world network.
@@ -220,11 +297,10 @@ class Analysis:
         Returns:
             bool: True if the network is small-world, False otherwise.
         """
-        if not nx.is_connected(self.network.anime_network):
-            raise ValueError("The network graph is not connected.")
+        self._require_connected()
         
-        avg_shortest_path_length = nx.average_shortest_path_length(self.network.anime_network)
-        clustering_coeff = nx.average_clustering(self.network.anime_network)
+        avg_shortest_path_length = self.average_shortest_path_length()
+        clustering_coeff = self.clustering_coefficient()
 
         # Small-world networks typically have:
         # - High clustering coefficient
@@ -232,6 +308,7 @@ class Analysis:
         # These thresholds can be adjusted based on the dataset
         return clustering_coeff > 0.5 and avg_shortest_path_length < 6
 
+    @profiled("Analysis.average_shortest_path_length")
     def average_shortest_path_length(self):
         """
         Calculate the average shortest path length across all nodes.
@@ -239,11 +316,12 @@ class Analysis:
         Returns:
             float: Average shortest path length.
         """
-        if not nx.is_connected(self.network.anime_network):
-            raise ValueError("The network graph is not connected.")
+        _, totals = self._require_connected()
         
-        return nx.average_shortest_path_length(self.network.anime_network)
+        num_characters = len(totals)
+        return float(totals.sum() / (num_characters * (num_characters - 1))) if num_characters > 1 else 0
 
+    @profiled("Analysis.clustering_coefficient")
     def clustering_coefficient(self):
         """
         Calculate the clustering coefficient, the percentage of all possible triangles that are complete.
@@ -251,9 +329,36 @@ class Analysis:
         Returns:
             float: Clustering coefficient.
         """
-        return nx.average_clustering(self.network.anime_network)
+        return float(self.network.graph.clustering().mean())
+
+    @profiled("Analysis.summary")
+    def summary(self):
+        """
+        Compute the network-wide metrics in one go, e.g. for batch reports.
+
+        Metrics that need a connected graph are None when it is not connected.
+
+        Returns:
+            dict: Metric name to value.
+        """
+        graph = self.network.graph
+        connected = graph.is_connected()
+        return {
+            "characters": graph.number_of_nodes(),
+            "relationships": graph.number_of_edges(),
+            "cutoff_val": self.cutoff_val(),
+            "cutoff_percentage": self.cutoff_percentage(),
+            "connected": connected,
+            "communities": len(set(self.detect_communities().values())),
+            "modularity": self.modularity(),
+            "clustering_coefficient": self.clustering_coefficient(),
+            "network_diameter": self.network_diameter() if connected else None,
+            "average_shortest_path_length": self.average_shortest_path_length() if connected else None,
+            "is_small_world_network": self.is_small_world_network() if connected else None,
+        }
 
 if __name__ == "__main__":
+    from DataCollection import Anime
 
     anime = Anime("Naruto", NARUTO, include_filler=False)
     analysis = Analysis(anime, save_preprocessing=True)
@@ -0,0 +1,179 @@
+'''
+Bit-packed character appearance vectors.
+
+Each character's appearances are stored as bits of uint64 words (episode k is bit k % 64 of word k // 64),
+so a character takes one bit per episode instead of a Python list entry, and the number of episodes two
+characters share is the popcount of their ANDed words.
+
+For the full characters x characters co-occurrence matrix a float32 matrix product over the unpacked bits
+is still faster than ANDing every pair of rows (BLAS beats the broadcast popcount by 3-5x), so
+co_occurrence() unpacks temporarily; counts and single pairs use popcount.
+'''
+from collections.abc import Mapping
+import numpy as np
+
+
+WORD_BITS = 64
+
+# Set bits of every byte value
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def table_popcount(words):
+    """
+    Number of set bits in every uint64 word, counted byte by byte with a lookup table.
+    """
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        """
+        Number of set bits in every uint64 word.
+        """
+        return np.bitwise_count(words)
+else:
+    # numpy < 2.0 has no bitwise_count
+    popcount = table_popcount
+
+
+class AppearanceMatrix(Mapping):
+    """
+    Characters' appearances across episodes, packed into bits.
+
+    Behaves like the dictionary it replaces: `matrix[character]` is the list of 0/1 appearances per
+    episode, and keys(), items(), len() and `in` work as before.
+
+    Attributes:
+        characters (List[str]): The characters, in row order.
+        words (np.ndarray): Characters x ceil(episodes / 64) uint64 words.
+        num_episodes (int): Number of episodes (bits used in each row).
+    """
+    def __init__(self, characters, words, num_episodes):
+        self.characters = list(characters)
+        self.index = {character: row for row, character in enumerate(self.characters)}
+        self.words = words
+        self.num_episodes = num_episodes
+
+    @classmethod
+    def from_dense(cls, characters, appearances):
+        """
+        Pack a characters x episodes 0/1 matrix.
+
+        Args:
+            characters (Iterable[str]): Names of the rows.
+            appearances (np.ndarray): Characters x episodes, nonzero where the character appears.
+
+        Returns:
+            AppearanceMatrix: The packed matrix.
+        """
+        appearances = np.asarray(appearances, dtype=bool)
+        if appearances.ndim != 2:  # No characters
+            appearances = appearances.reshape(len(characters), 0)
+        num_episodes = appearances.shape[1]
+        num_words = -(-num_episodes // WORD_BITS)
+        packed = np.packbits(appearances, axis=1, bitorder="little")
+        padded = np.zeros((len(appearances), num_words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        words = padded.view("<u8").astype(np.uint64, copy=False)
+        return cls(characters, words, num_episodes)
+
+    @classmethod
+    def from_lists(cls, characters_episodes):
+        """
+        Pack a dictionary of per-character 0/1 lists (the format used before this class).
+        """
+        characters = list(characters_episodes.keys())
+        return cls.from_dense(characters, [characters_episodes[character] for character in characters])
+
+    def to_dense(self, dtype=np.uint8):
+        """
+        Unpack into a characters x episodes matrix of 0/1.
+        """
+        data = self.words.astype("<u8", copy=False).view(np.uint8)
+        return np.unpackbits(data, axis=1, count=self.num_episodes, bitorder="little").astype(dtype, copy=False)
+
+    def expand(self, values, dtype=None):
+        """
+        Spread one value per appearance into a characters x episodes matrix (0 where absent).
+
+        Args:
+            values (np.ndarray): One value per set bit, row by row and by episode within a row
+                                 (the order of `to_dense()[to_dense() > 0]`).
+            dtype: Type of the result (default: that of `values`).
+
+        Returns:
+            np.ndarray: Characters x episodes matrix.
+        """
+        values = np.asarray(values)
+        present = self.to_dense(bool)
+        dense = np.zeros(present.shape, dtype=dtype or values.dtype)
+        dense[present] = values
+        return dense
+
+    def __getitem__(self, character):
+        row = self.words[self.index[character]][None, :]
+        data = row.astype("<u8", copy=False).view(np.uint8)
+        return np.unpackbits(data, axis=1, count=self.num_episodes, bitorder="little")[0].tolist()
+
+    def __iter__(self):
+        return iter(self.characters)
+
+    def __len__(self):
+        return len(self.characters)
+
+    def __contains__(self, character):
+        return character in self.index
+
+    def __repr__(self):
+        return f"AppearanceMatrix({len(self)} characters x {self.num_episodes} episodes)"
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def counts(self):
+        """
+        Number of episodes each character appears in, in row order.
+        """
+        return popcount(self.words).sum(axis=1, dtype=np.int64)
+
+    def count(self, character):
+        return int(popcount(self.words[self.index[character]]).sum())
+
+    def shared_episodes(self, char1, char2):
+        """
+        Number of episodes both characters appear in.
+        """
+        both = self.words[self.index[char1]] & self.words[self.index[char2]]
+        return int(popcount(both).sum())
+
+    def co_occurrence(self):
+        """
+        Number of episodes shared by every pair of characters (the diagonal is each character's count).
+
+        Returns:
+            np.ndarray: Characters x characters int64 matrix.
+        """
+        # Counts are exact in float32 up to 2 ** 24 episodes
+        appearances = self.to_dense(np.float32)
+        return (appearances @ appearances.T).astype(np.int64)
+
+    def select(self, characters=None, episodes=None):
+        """
+        A new matrix restricted to some characters and/or episodes.
+
+        Args:
+            characters (Iterable[str]): Characters to keep, in the order given (default: all).
+            episodes (np.ndarray): Boolean mask over episodes to keep (default: all).
+
+        Returns:
+            AppearanceMatrix: The selection.
+        """
+        characters = self.characters if characters is None else list(characters)
+        subset = AppearanceMatrix(characters, self.words[[self.index[character] for character in characters]],
+                                  self.num_episodes)
+        if episodes is None:
+            return subset
+        return AppearanceMatrix.from_dense(characters, subset.to_dense(bool)[:, np.asarray(episodes, dtype=bool)])
@@ -0,0 +1,194 @@
+'''
+Batch pipeline runner for many anime.
+
+Reads a manifest of anime and their series IDs and runs scraping, preprocessing, graph build and
+analytics for each one in its own process. Scraped pages go through a shared on-disk HTTP cache, so
+reruns fetch nothing. With --refresh the Jikan episode lists are always fetched again, so new episodes
+show up, while episode pages already in the cache are reused (or fetched again once older than
+--cache-max-age): nightly refreshes only fetch the lists and the new or expired pages.
+
+Manifest (JSON), either a list of entries or {"defaults": {...}, "anime": [...]}:
+    {
+        "defaults": {"include_filler": false},
+        "anime": [
+            {"name": "Naruto", "series": [["Naruto", 20]]},
+            {"name": "Jujutsu Kaisen", "series": [["Jujutsu Kaisen", 40748], ["Jujutsu Kaisen Season 2", 51009]]},
+            {"name": "Bleach", "series": [["Bleach", 269]], "links": "title", "layout": "table"}
+        ]
+    }
+
+Entries accept any keyword argument of Anime (include_filler, api_url, wiki_url, links, layout, cache_max_age, ...).
+
+Usage:
+    python BatchRunner.py manifest.json --output ./data/batch --workers 8
+    python BatchRunner.py manifest.json --refresh --cache-max-age 86400   # nightly refresh
+'''
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from DataCollection import Anime
+from Network import Anime_Network
+from Analytics import Analysis
+from Profiling import PROFILER
+
+
+def load_manifest(path):
+    """
+    Read a manifest and apply its defaults to every entry.
+
+    Raises a ValueError if an entry is incomplete, or two names are the same or map to the same folder.
+
+    Returns:
+        List[dict]: One entry per anime, each with at least `name` and `series`.
+    """
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"anime": manifest}
+
+    defaults = manifest.get("defaults", {})
+    entries = [{**defaults, **entry} for entry in manifest["anime"]]
+    slugs = {}
+    for entry in entries:
+        if "name" not in entry or "series" not in entry:
+            raise ValueError(f"Manifest entry {entry} needs a 'name' and a 'series' list.")
+        # Every anime gets its own output folder and summary row
+        slug = slugify(entry["name"])
+        if slug in slugs:
+            raise ValueError(f"Manifest entries '{slugs[slug]}' and '{entry['name']}' would share the output folder '{slug}'.")
+        slugs[slug] = entry["name"]
+    return entries
+
+
+def slugify(name):
+    return "".join(c if c.isalnum() else "_" for c in name.lower()).strip("_")
+
+
+def run_anime(entry, output_dir, cache_dir=None, refresh=False, scrape_workers=4, profile=False):
+    """
+    Run the whole pipeline for one anime and write its artifacts and results table.
+
+    Writes to <output_dir>/<slug>/: episodes.csv, network.pkl, results.json, results.csv
+    (and profile.json when profiling).
+
+    Args:
+        entry (dict): Manifest entry for the anime.
+        output_dir (str): Root directory for the per-anime outputs.
+        cache_dir (str): Shared HTTP cache directory.
+        refresh (bool): Scrape again even if episodes.csv exists, fetching the episode lists again
+                        (cached episode pages are still reused).
+        scrape_workers (int): Episode pages fetched concurrently.
+        profile (bool): Write a profiling report for this anime.
+
+    Returns:
+        dict: One row of the batch summary.
+    """
+    start = time.perf_counter()
+    options = {k: v for k, v in entry.items() if k not in ("name", "series", "cache_dir")}
+    anime_dir = os.path.join(output_dir, slugify(entry["name"]))
+    os.makedirs(anime_dir, exist_ok=True)
+    episodes_file = os.path.join(anime_dir, "episodes.csv")
+    row = {"name": entry["name"], "status": "ok", "error": None}
+
+    if profile:
+        PROFILER.enable(report_path=os.path.join(anime_dir, "profile.json"))
+    try:
+        anime = Anime(entry["name"], entry["series"], cache_dir=cache_dir, **options)
+        if refresh or not os.path.exists(episodes_file):
+            anime.save_episodes(csv_file_path=episodes_file, workers=scrape_workers, refresh=refresh)
+
+        network = Anime_Network(anime)
+        network.preProcessing(episodes_file=episodes_file, characters_file=os.path.join(anime_dir, "characters.csv"))
+        network.network(save=False)
+        network.save_network(os.path.join(anime_dir, "network.pkl"))
+
+        results = Analysis(anime, network=network).summary()
+        row.update(results)
+        with open(os.path.join(anime_dir, "results.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        with open(os.path.join(anime_dir, "results.csv"), mode="w", newline="", encoding="utf-8") as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(["Metric", "Value"])
+            csv_writer.writerows(results.items())
+    except Exception as e:
+        row.update(status="failed", error=f"{e!r}")
+        traceback.print_exc()
+    finally:
+        if profile:
+            PROFILER.disable()
+            PROFILER.save_report()
+
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+
+def run_batch(entries, output_dir="./data/batch", workers=None, cache_dir=None, refresh=False, scrape_workers=4,
+              profile=False):
+    """
+    Run every manifest entry across a process pool and write the batch summary table.
+
+    Args:
+        entries (List[dict]): Manifest entries, see load_manifest.
+        output_dir (str): Root directory for all outputs; the summary goes to <output_dir>/summary.csv.
+        workers (int): Number of processes (default: one per anime, capped at the CPU count).
+        cache_dir (str): Shared HTTP cache directory (default: <output_dir>/http_cache).
+
+    Returns:
+        List[dict]: One summary row per anime, in manifest order.
+    """
+    cache_dir = cache_dir or os.path.join(output_dir, "http_cache")
+    workers = workers or min(len(entries), os.cpu_count() or 1)
+    os.makedirs(output_dir, exist_ok=True)
+
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_anime, entry, output_dir, cache_dir, refresh, scrape_workers, profile): entry["name"]
+            for entry in entries
+        }
+        for future in as_completed(futures):
+            row = future.result()
+            rows[futures[future]] = row
+            print(f"[{row['status'].upper()}] {row['name']} in {row['seconds']:.1f}s")
+
+    ordered = [rows[entry["name"]] for entry in entries]
+    fieldnames = []
+    for row in ordered:
+        fieldnames += [key for key in row if key not in fieldnames]
+    summary_file = os.path.join(output_dir, "summary.csv")
+    with open(summary_file, mode="w", newline="", encoding="utf-8") as f:
+        csv_writer = csv.DictWriter(f, fieldnames=fieldnames)
+        csv_writer.writeheader()
+        csv_writer.writerows(ordered)
+    print(f"Batch summary saved to {summary_file}")
+    return ordered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the anime network pipeline for every anime in a manifest.")
+    parser.add_argument("manifest", help="JSON manifest of anime and their series IDs")
+    parser.add_argument("--output", default="./data/batch")
+    parser.add_argument("--workers", type=int, help="Processes (default: one per anime, up to the CPU count)")
+    parser.add_argument("--cache-dir", help="Shared HTTP cache (default: <output>/http_cache)")
+    parser.add_argument("--refresh", action="store_true", help="Scrape again, fetching the episode lists anew")
+    parser.add_argument("--cache-max-age", type=float, help="Seconds before cached pages are fetched again")
+    parser.add_argument("--scrape-workers", type=int, default=4, help="Episode pages fetched concurrently per anime")
+    parser.add_argument("--profile", action="store_true", help="Write a profile.json per anime")
+    args = parser.parse_args(argv)
+
+    entries = load_manifest(args.manifest)
+    if args.cache_max_age is not None:
+        for entry in entries:
+            entry.setdefault("cache_max_age", args.cache_max_age)
+    rows = run_batch(entries, args.output, args.workers, args.cache_dir, args.refresh,
+                     args.scrape_workers, args.profile)
+    return 0 if all(row["status"] == "ok" for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+'''
+Benchmark suite for the network pipeline.
+
+Times and memory-profiles every stage (preProcessing, network, max_cutoff_for_connected_graph,
+save/load and each Analysis metric) on synthetic data across size tiers, and writes the results
+as JSON so runs can be compared for regressions. With --scrape, also measures scraping throughput
+against a local StandInServer, and with --imports the cold-start cost of the analysis core.
+
+Usage:
+    python Benchmark.py --tiers small medium --repeat 3 --output bench_results.json
+    python Benchmark.py --scrape --latency 0.05 --workers 1 4 16
+    python Benchmark.py --tiers --imports
+    python Benchmark.py --compare bench_baseline.json
+'''
+import argparse
+import contextlib
+import copy
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import networkx as nx
+import numpy as np
+from Analytics import Analysis
+from DataCollection import Anime
+from Network import Anime_Network
+from StandInServer import StandInServer
+from Synthetic import SyntheticAnime
+
+
+# Optional visualization and scraping dependencies the analysis core should not import
+HEAVY_MODULES = ("matplotlib", "pyvis", "tqdm", "bs4", "requests", "pandas")
+
+# Synthetic data sizes, with a fifth of the episodes flagged as filler
+TIERS = {
+    "small": {"num_characters": 40, "num_episodes": 60, "cast_size": 8, "filler_rate": 0.2},
+    "medium": {"num_characters": 120, "num_episodes": 220, "cast_size": 14, "filler_rate": 0.2},
+    "large": {"num_characters": 300, "num_episodes": 500, "cast_size": 20, "filler_rate": 0.2},
+}
+
+
+def measure(setup, run, repeat=3, memory=True):
+    """
+    Time `run(setup())` `repeat` times, then run it once more under tracemalloc for peak memory.
+
+    Setup runs outside the timed region and gives each repetition a fresh state.
+
+    Returns:
+        dict: Timing statistics in seconds and the peak traced allocation in bytes.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+
+    peak_bytes = None
+    if memory:
+        state = setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(state)
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "seconds_mean": statistics.mean(timings),
+        "peak_bytes": peak_bytes,
+    }
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """
+    Silence the pipeline's prints and progress bars while benchmarking.
+    """
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+def pipeline_stages(anime, workdir):
+    """
+    Build the benchmark stages for one synthetic anime.
+
+    Returns:
+        List[Tuple[str, Callable, Callable]]: (stage name, setup, run) for every stage.
+    """
+    episodes_file = os.path.join(workdir, "episodes.csv")
+    network_file = os.path.join(workdir, "network.pkl")
+    anime.save_episodes(csv_file_path=episodes_file)
+
+    # Reference artifacts each stage starts from
+    processed = Anime_Network(anime)
+    processed.preProcessing(episodes_file=episodes_file)
+    untrimmed = copy.deepcopy(processed)
+    untrimmed.network(trimmed=False, save=False)
+    trimmed = copy.deepcopy(untrimmed)
+    trimmed.max_cutoff_for_connected_graph()
+    trimmed.save_network(network_file)
+
+    def fresh_processed():
+        network = Anime_Network(anime)
+        network.characters_episodes = copy.deepcopy(processed.characters_episodes)
+        network.episode_filler = processed.episode_filler
+        return network
+
+    def fresh_untrimmed():
+        network = Anime_Network(anime)
+        network.characters_episodes = processed.characters_episodes
+        # CSR graphs are never modified in place, so the network can share it
+        network.graph = untrimmed.graph
+        return network
+
+    stages = [
+        ("preProcessing", lambda: Anime_Network(anime), lambda n: n.preProcessing(episodes_file=episodes_file)),
+        ("network", fresh_processed, lambda n: n.network(trimmed=False, save=False)),
+        ("network_canon_only", fresh_processed, lambda n: n.network(save=False, include_filler=False)),
+        ("max_cutoff_for_connected_graph", fresh_untrimmed, lambda n: n.max_cutoff_for_connected_graph()),
+        ("save_network", lambda: trimmed, lambda n: n.save_network(network_file)),
+        ("load_network", lambda: None, lambda _: Anime_Network.load_network(network_file)),
+        ("networkx_view", lambda: Anime_Network.load_network(network_file), lambda n: n.anime_network),
+    ]
+
+    # Characters to query: the best-connected one and the one farthest from it
+    graph = trimmed.graph
+    hub = graph.nodes[int(np.argmax(graph.degree()))]
+    distances, _ = graph.bfs(graph.index[hub])
+    far = graph.nodes[int(np.argmax(distances))]
+
+    metrics = {
+        "cutoff_val": lambda a: a.cutoff_val(),
+        "cutoff_percentage": lambda a: a.cutoff_percentage(),
+        "popularity_score": lambda a: a.popularity_score(hub),
+        "top_relationships": lambda a: a.top_relationships(hub),
+        "get_neighbors": lambda a: a.get_neighbors(hub),
+        "detect_communities": lambda a: a.detect_communities(),
+        "modularity": lambda a: a.modularity(),
+        "one_minus_modularity": lambda a: a.one_minus_modularity(),
+        "shortest_path": lambda a: a.shortest_path(hub, far),
+        "network_diameter": lambda a: a.network_diameter(),
+        "longest_path": lambda a: a.longest_path(),
+        "weighted_network_diameter": lambda a: a.weighted_network_diameter(),
+        "average_shortest_path_length": lambda a: a.average_shortest_path_length(),
+        "clustering_coefficient": lambda a: a.clustering_coefficient(),
+        "is_small_world_network": lambda a: a.is_small_world_network(),
+    }
+    for name, metric in metrics.items():
+        # A new Analysis per run so cached community results are not reused between repetitions
+        stages.append((f"Analysis.{name}", lambda: Analysis(None, network=trimmed), metric))
+
+    graph_info = {
+        "characters": len(processed.characters_episodes),
+        "appearance_bytes": processed.characters_episodes.nbytes,
+        "edges_untrimmed": untrimmed.graph.number_of_edges(),
+        "edges_trimmed": graph.number_of_edges(),
+    }
+    return stages, graph_info
+
+
+def run_benchmarks(tiers=("small", "medium"), repeat=3, memory=True, stages=None, seed=0, verbose=True):
+    """
+    Run the benchmark suite for the given tiers.
+
+    Args:
+        tiers (Iterable[str]): Names of tiers in TIERS to run.
+        repeat (int): Timed repetitions per stage.
+        memory (bool): Whether to do an extra traced run per stage for peak memory.
+        stages (Iterable[str]): Only run stages whose name contains one of these strings.
+        seed (int): Seed for the synthetic data.
+
+    Returns:
+        dict: Run metadata and one result entry per (tier, stage).
+    """
+    results = []
+    for tier in tiers:
+        anime = SyntheticAnime(name=f"Synthetic {tier}", seed=seed, **TIERS[tier])
+        with tempfile.TemporaryDirectory() as workdir:
+            with quiet():
+                tier_stages, graph_info = pipeline_stages(anime, workdir)
+            for name, setup, run in tier_stages:
+                if stages and not any(s in name for s in stages):
+                    continue
+                try:
+                    with quiet():
+                        stats = measure(setup, run, repeat=repeat, memory=memory)
+                except Exception as e:
+                    # Keep going so one failing metric doesn't hide the rest of the run
+                    results.append({"tier": tier, "stage": name, **TIERS[tier], **graph_info, "error": repr(e)})
+                    if verbose:
+                        print(f"[{tier}] {name:<42} [ERROR] {e!r}")
+                    continue
+                results.append({"tier": tier, "stage": name, **TIERS[tier], **graph_info, **stats})
+                if verbose:
+                    peak = f"{stats['peak_bytes'] / 1024:.0f} KiB" if stats["peak_bytes"] is not None else "-"
+                    print(f"[{tier}] {name:<42} {stats['seconds_min'] * 1000:10.2f} ms  peak {peak}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "networkx": nx.__version__,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def scrape_benchmarks(num_episodes=60, latency=0.02, workers=(1, 4, 16), error_rate=0.0, rate_limit=None,
+                      seed=0, verbose=True):
+    """
+    Measure scraping throughput of Anime.save_episodes against a local StandInServer.
+
+    Args:
+        num_episodes (int): Number of synthetic episodes served.
+        latency (float): Latency the server adds to every response, in seconds.
+        workers (Iterable[int]): Concurrency levels to measure.
+        error_rate (float): Fraction of requests answered with a 500 (retried by the scraper).
+        rate_limit (int): Requests per second allowed before the server answers 429.
+        seed (int): Seed for the synthetic data and injected faults.
+
+    Returns:
+        List[dict]: One result entry per concurrency level.
+    """
+    results = []
+    synthetic = SyntheticAnime(name="Naruto", num_episodes=num_episodes, seed=seed)
+    for count in workers:
+        server = StandInServer(latency=latency, error_rate=error_rate, rate_limit=rate_limit, seed=seed)
+        server.serve_anime(synthetic, 1, "naruto")
+        with server, tempfile.TemporaryDirectory() as workdir:
+            anime = Anime("Naruto", [["Naruto", 1]], api_url=server.api_url, wiki_url=server.wiki_url("naruto"),
+                          backoff=0.01)
+            start = time.perf_counter()
+            with quiet():
+                anime.save_episodes(csv_file_path=os.path.join(workdir, "episodes.csv"), workers=count)
+            seconds = time.perf_counter() - start
+
+        stats = dict(server.stats)
+        results.append({
+            "tier": "scrape",
+            "stage": f"save_episodes[workers={count}]",
+            "num_episodes": num_episodes,
+            "latency": latency,
+            "error_rate": error_rate,
+            "rate_limit": rate_limit,
+            "repeat": 1,
+            "seconds_min": seconds,
+            "episodes_per_second": num_episodes / seconds,
+            "requests": sum(v for k, v in stats.items() if k != "bytes"),
+            "responses": {str(k): v for k, v in stats.items() if k != "bytes"},
+            "bytes": stats.get("bytes", 0),
+        })
+        if verbose:
+            print(f"[scrape] workers={count:<3} {seconds:8.2f} s  {num_episodes / seconds:8.1f} episodes/s")
+    return results
+
+
+def _run_python(code, repeat):
+    """
+    Run `code` in fresh interpreters with -X importtime and the repo on the path.
+
+    Returns:
+        List[Tuple[float, str, str]]: (process wall seconds, stdout, stderr) per run.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get("PYTHONPATH")]))
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, capture_output=True,
+                                 text=True, check=True)
+        runs.append((time.perf_counter() - start, process.stdout, process.stderr))
+    return runs
+
+
+def _cumulative_import_seconds(importtime_output, module):
+    for line in importtime_output.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    return 0.0
+
+
+def import_benchmarks(modules=("Network", "Analytics"), repeat=5, verbose=True):
+    """
+    Measure the cold-start cost of the analysis core in fresh interpreters.
+
+    For every module: its cumulative import time (from -X importtime) and which HEAVY_MODULES it
+    drags in. Then a worker cold start: import, load a saved network and compute one metric.
+
+    Returns:
+        List[dict]: One result entry per module plus one for the worker cold start.
+    """
+    check = f"import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    baseline = min(seconds for seconds, _, _ in _run_python("pass", repeat))
+    results = []
+    for module in modules:
+        runs = _run_python(f"import {module}; {check}", repeat)
+        imports = [_cumulative_import_seconds(stderr, module) for _, _, stderr in runs]
+        results.append({
+            "tier": "imports",
+            "stage": f"import {module}",
+            "repeat": repeat,
+            "seconds_min": min(imports),
+            "seconds_median": statistics.median(imports),
+            "process_seconds_min": min(seconds for seconds, _, _ in runs),
+            "interpreter_seconds_min": baseline,
+            "heavy_modules_loaded": [m for m in runs[0][1].strip().split(",") if m],
+        })
+
+    with tempfile.TemporaryDirectory() as workdir, quiet():
+        network_file = os.path.join(workdir, "network.pkl")
+        anime = SyntheticAnime(name="Synthetic imports", **TIERS["small"])
+        anime.save_episodes(csv_file_path=os.path.join(workdir, "episodes.csv"))
+        network = Anime_Network(anime)
+        network.preProcessing(episodes_file=os.path.join(workdir, "episodes.csv"))
+        network.network(save=False)
+        network.save_network(network_file)
+
+        code = (
+            "import time; start = time.perf_counter()\n"
+            "import contextlib, io\n"
+            "from Network import Anime_Network\n"
+            "from Analytics import Analysis\n"
+            "with contextlib.redirect_stdout(io.StringIO()):\n"
+            f"    network = Anime_Network.load_network({network_file!r})\n"
+            "Analysis(None, network=network).clustering_coefficient()\n"
+            f"print(time.perf_counter() - start); {check}"
+        )
+        runs = _run_python(code, repeat)
+
+    timings = [float(stdout.splitlines()[0]) for _, stdout, _ in runs]
+    results.append({
+        "tier": "imports",
+        "stage": "cold start: load network + clustering_coefficient",
+        "repeat": repeat,
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "process_seconds_min": min(seconds for seconds, _, _ in runs),
+        "interpreter_seconds_min": baseline,
+        "heavy_modules_loaded": [m for m in runs[0][1].splitlines()[1].split(",") if m],
+    })
+
+    if verbose:
+        for result in results:
+            heavy = ", ".join(result["heavy_modules_loaded"]) or "none"
+            print(f"[imports] {result['stage']:<50} {result['seconds_min'] * 1000:8.1f} ms  heavy modules: {heavy}")
+    return results
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Compare two benchmark reports on their minimum times.
+
+    Returns:
+        List[Tuple[str, str, float, float]]: (tier, stage, baseline seconds, current seconds) for
+                                             every stage that got slower by more than `tolerance`.
+    """
+    previous = {(r["tier"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["tier"], result["stage"]))
+        if "error" in result or not before or "error" in before:
+            continue
+        if result["seconds_min"] > before["seconds_min"] * (1 + tolerance):
+            regressions.append((result["tier"], result["stage"], before["seconds_min"], result["seconds_min"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the anime network pipeline on synthetic data.")
+    parser.add_argument("--tiers", nargs="*", default=["small", "medium"], choices=list(TIERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", help="Only run stages whose name contains one of these")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run for peak memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--scrape", action="store_true", help="Also benchmark scraping against a StandInServer")
+    parser.add_argument("--scrape-episodes", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stand-in server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, help="Stand-in server requests per second before 429s")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--imports", action="store_true", help="Also benchmark the analysis core's cold start")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.tiers, args.repeat, not args.no_memory, args.stages, args.seed)
+    if args.scrape:
+        report["results"] += scrape_benchmarks(args.scrape_episodes, args.latency, args.workers, args.error_rate,
+                                               args.rate_limit, args.seed)
+    if args.imports:
+        report["results"] += import_benchmarks(repeat=args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for tier, stage, before, after in regressions:
+            print(f"[REGRESSION] [{tier}] {stage}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
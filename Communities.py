@@ -0,0 +1,164 @@
+'''
+Ensemble Louvain community detection.
+
+Runs many seeded Louvain passes (optionally over several resolutions) across a process pool
+and merges them into a consensus partition with a stability score per character.
+'''
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import community as community_louvain
+import networkx as nx
+import numpy as np
+
+
+# Graph shared with the worker processes, set once per worker by _init_worker
+_worker_graph = None
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _louvain_pass(task, graph=None):
+    resolution, seed = task
+    graph = _worker_graph if graph is None else graph
+    return community_louvain.best_partition(graph, resolution=resolution, random_state=seed)
+
+
+def graph_fingerprint(graph):
+    """
+    Compute a fingerprint of a weighted graph so results can be cached per graph.
+
+    Args:
+        graph (nx.Graph): The graph to fingerprint.
+
+    Returns:
+        str: A hex digest that changes whenever nodes, edges or weights change.
+    """
+    digest = hashlib.sha1()
+    for node in sorted(map(str, graph.nodes())):
+        digest.update(node.encode("utf-8"))
+        digest.update(b"\0")
+    edges = sorted(
+        tuple(sorted((str(u), str(v)))) + (repr(d.get("weight", 1)),) for u, v, d in graph.edges(data=True)
+    )
+    for u, v, weight in edges:
+        digest.update(f"{u}\0{v}\0{weight}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def run_louvain_ensemble(graph, runs=1, resolutions=(1.0,), seed=0, workers=None):
+    """
+    Run seeded Louvain passes for every resolution, in parallel when more than one pass is needed.
+
+    Args:
+        graph (nx.Graph): The weighted character graph.
+        runs (int): Number of seeded passes per resolution.
+        resolutions (Iterable[float]): Louvain resolution parameters to sweep.
+        seed (int): Base seed; pass i uses seed + i, so results are reproducible.
+        workers (int): Size of the process pool (default: number of CPUs). 1 runs in-process.
+
+    Returns:
+        Dict[float, List[Dict[str, int]]]: The partitions of every pass, keyed by resolution.
+    """
+    tasks = [(resolution, seed + i) for resolution in resolutions for i in range(runs)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    if workers <= 1:
+        partitions = [_louvain_pass(task, graph) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph,)) as pool:
+            partitions = list(pool.map(_louvain_pass, tasks))
+
+    results = {resolution: [] for resolution in resolutions}
+    for (resolution, _), partition in zip(tasks, partitions):
+        results[resolution].append(partition)
+    return results
+
+
+def _renumber(partition):
+    """
+    Relabel communities from 0 by decreasing size (ties broken by smallest member).
+    """
+    members = {}
+    for node, community in partition.items():
+        members.setdefault(community, []).append(node)
+    ordered = sorted(members.values(), key=lambda group: (-len(group), min(group)))
+    return {node: label for label, group in enumerate(ordered) for node in group}
+
+
+def partition_modularity(partition, graph, resolution=1.0):
+    """
+    Weighted modularity of a partition at the given Louvain resolution.
+
+    Args:
+        partition (Dict[str, int]): Community of each node.
+        graph (nx.Graph): The weighted graph the partition was computed on.
+        resolution (float): Resolution parameter the partition was computed with.
+
+    Returns:
+        float: The modularity score.
+    """
+    members = {}
+    for node, community in partition.items():
+        members.setdefault(community, set()).add(node)
+    return nx.community.modularity(graph, members.values(), weight="weight", resolution=resolution)
+
+
+def consensus_partition(partitions, threshold=0.5, seed=0):
+    """
+    Merge several partitions of the same nodes into a consensus partition.
+
+    Builds the co-association matrix (the fraction of passes in which two characters share a
+    community), drops pairs below `threshold` and runs Louvain once more on what is left.
+
+    Args:
+        partitions (List[Dict[str, int]]): Partitions produced by independent passes.
+        threshold (float): Minimum co-association for two characters to stay linked.
+        seed (int): Seed for the final Louvain pass over the co-association graph.
+
+    Returns:
+        Dict[str, int]: The consensus partition (communities numbered from 0 by size).
+        Dict[str, float]: Per-node stability, the mean co-association between a character and
+                          the other members of its consensus community (1.0 for singletons).
+    """
+    nodes = list(partitions[0].keys())
+    if len(partitions) == 1:
+        return _renumber(partitions[0]), {node: 1.0 for node in nodes}
+
+    # Step 1: Co-association matrix, one label vector per pass
+    labels = np.array([[partition[node] for node in nodes] for partition in partitions])
+    co_association = np.zeros((len(nodes), len(nodes)))
+    for row in labels:
+        co_association += row[:, None] == row[None, :]
+    co_association /= len(partitions)
+
+    # Step 2: Cluster the co-association graph
+    consensus_graph = nx.Graph()
+    consensus_graph.add_nodes_from(nodes)
+    rows, cols = np.nonzero(np.triu(co_association, k=1) >= threshold)
+    consensus_graph.add_weighted_edges_from(
+        (nodes[i], nodes[j], co_association[i, j]) for i, j in zip(rows, cols)
+    )
+    if consensus_graph.number_of_edges():
+        raw = community_louvain.best_partition(consensus_graph, random_state=seed)
+    else:
+        raw = {node: i for i, node in enumerate(nodes)}
+
+    # Step 3: Renumber communities by size so labels are stable between calls
+    partition = _renumber(raw)
+
+    # Step 4: Stability of each node within its consensus community
+    index = {node: i for i, node in enumerate(nodes)}
+    members = {}
+    for node, community in partition.items():
+        members.setdefault(community, []).append(node)
+    stability = {}
+    for group in members.values():
+        ids = [index[node] for node in group]
+        for i in ids:
+            others = [j for j in ids if j != i]
+            stability[nodes[i]] = float(co_association[i, others].mean()) if others else 1.0
+    return partition, stability
@@ -1,8 +1,81 @@
 import csv
+import hashlib
+import os
 import time
-from bs4 import BeautifulSoup
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from colorama import Fore, Back, Style
+from Profiling import PROFILER, profiled
+
+# requests and BeautifulSoup are imported on first use, so unpickling an Anime (e.g. inside a saved
+# Anime_Network) does not pull in the scraping stack
+
+
+JIKAN_URL = "https://api.jikan.moe/v4"
+FANDOM_URL = "https://{slug}.fandom.com/wiki/"
+
+# How each wiki names its episode pages ("title" or "number") and lists the characters on them ("table" or "list")
+WIKI_FORMATS = {
+    "Naruto": {"links": "title", "layout": "table"},
+    "Jujutsu Kaisen": {"links": "number", "layout": "list"},
+}
+
+
+def fetch(url, retries=3, backoff=1.0, timeout=30, cache_dir=None, cache_max_age=None):
+    """
+    GET a URL, retrying on rate limits (429) and server errors (5xx).
+
+    Args:
+        url (str): The URL to fetch.
+        retries (int): Number of retries after the first attempt.
+        backoff (float): Base delay in seconds, doubled after every retry. A Retry-After header wins if longer.
+        timeout (float): Per-request timeout in seconds.
+        cache_dir (str): Directory of an on-disk cache of successful responses, safe to share between processes.
+        cache_max_age (float): Seconds after which cached responses are fetched again (default: never).
+
+    Returns:
+        requests.Response: The last response received.
+    """
+    import requests
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        if os.path.exists(cache_path) and (
+            cache_max_age is None or time.time() - os.path.getmtime(cache_path) < cache_max_age
+        ):
+            PROFILER.count("http_cache_hits")
+            response = requests.Response()
+            response.status_code = 200
+            response.url = url
+            response.encoding = "utf-8"
+            with open(cache_path, "rb") as f:
+                response._content = f.read()
+            return response
+
+    for attempt in range(retries + 1):
+        with PROFILER.stage("http_fetch"):
+            response = requests.get(url, timeout=timeout)
+        PROFILER.count("http_requests")
+        PROFILER.count("bytes_fetched", len(response.content))
+        if response.status_code == 200 and cache_path:
+            # Write then rename so concurrent readers never see a partial file
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(response.content)
+            os.replace(temp_path, cache_path)
+        if response.status_code != 429 and response.status_code < 500 or attempt == retries:
+            return response
+        PROFILER.count("http_retries")
+        delay = backoff * 2 ** attempt
+        try:
+            delay = max(delay, float(response.headers.get("Retry-After", 0)))
+        except ValueError:
+            pass
+        print(Fore.YELLOW + f"[WARNING] {response.status_code} at {url}, retrying in {delay:.2f}s")
+        print(Style.RESET_ALL)
+        time.sleep(delay)
+    return response
 
 
 class Series:
@@ -13,25 +86,40 @@ class Series:
         name (str): The name of the series.
         mal_id (int): The MyAnimeList ID for the series.
         episodes (list): A list of episodes for the series.
+        filler_episodes (list): Episode numbers Jikan flags as filler.
+        api_url (str): Base URL of the Jikan API (default: the public api.jikan.moe).
+        retries (int): Retries on rate limits and server errors.
+        backoff (float): Base retry delay in seconds.
+        cache_dir (str): Directory of the shared on-disk response cache (default: no cache).
+        cache_max_age (float): Seconds after which cached responses are fetched again.
     """
-    def __init__(self, name, mal_id):
+    def __init__(self, name, mal_id, api_url=JIKAN_URL, retries=3, backoff=1.0, cache_dir=None, cache_max_age=None):
         self.name = name
         self.mal_id = mal_id
-        self.url_template = f"https://api.jikan.moe/v4/anime/{self.mal_id}/episodes"
+        self.api_url = api_url
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_dir = cache_dir
+        self.cache_max_age = cache_max_age
+        self.url_template = f"{api_url}/anime/{self.mal_id}/episodes"
         self.episodes = []
         self.filler_episodes = []
 
-    def fetch_episodes(self, offset=0, debug=False):
+    def fetch_episodes(self, offset=0, debug=False, refresh=False):
         """
         Fetch episodes for the series and store them in the episodes attribute.
 
         Args:
             offset (int): The starting episode number for this series (default: 0).
+            refresh (bool): Fetch the episode list again even if it is cached, so new episodes show up.
         """
+        # A max age of 0 skips the cached pages and caches the fresh ones
+        cache_max_age = 0 if refresh else self.cache_max_age
         page = 1
         while True:
             url = f"{self.url_template}?page={page}"
-            response = requests.get(url)
+            response = fetch(url, retries=self.retries, backoff=self.backoff,
+                             cache_dir=self.cache_dir, cache_max_age=cache_max_age)
 
             if response.status_code != 200:
                 print(Fore.RED + f"[ERROR] Error {response.status_code} at {url}")
@@ -43,8 +131,11 @@ class Series:
                 self.episodes.append({
                     "series": self.name,
                     "episode_number": offset + ep["mal_id"],
-                    "title": ep["title"]
+                    "title": ep["title"],
+                    "filler": bool(ep.get("filler"))
                 })
+                if self.episodes[-1]["filler"]:
+                    self.filler_episodes.append(self.episodes[-1]["episode_number"])
                 if debug:
                     print(f"[DEBUG] {self.episodes[-1]}")
                     time.sleep(0.5)
@@ -72,22 +163,47 @@ class Anime:
         name (str): The name of the anime.
         series_list (list): A list of Series objects.
         all_episodes (list): A combined list of all episodes from all series.
-        include_filler (bool): Whether to include filler episodes.
+        include_filler (bool): Whether to include filler episodes. Every episode is still scraped with its filler
+                               status; the preference is applied when the network is built.
+        api_url (str): Base URL of the Jikan API (default: the public api.jikan.moe).
+        wiki_url (str): Base URL of the wiki episode pages (default: the anime's fandom.com wiki).
+        retries (int): Retries on rate limits and server errors.
+        backoff (float): Base retry delay in seconds.
+        cache_dir (str): Directory of the shared on-disk response cache (default: no cache).
+        cache_max_age (float): Seconds after which cached responses are fetched again.
+        links (str): How episode pages are named, "title" or "number" (default: from WIKI_FORMATS).
+        layout (str): How characters are listed on episode pages, "table" or "list" (default: from WIKI_FORMATS).
     """
-    def __init__(self, name, series_info, include_filler=True):
+    def __init__(self, name, series_info, include_filler=True, api_url=JIKAN_URL, wiki_url=None, retries=3,
+                 backoff=1.0, cache_dir=None, cache_max_age=None, links=None, layout=None):
         self.name = name
-        self.series_list = [Series(name, mal_id) for name, mal_id in series_info]
+        self.series_list = [
+            Series(name, mal_id, api_url=api_url, retries=retries, backoff=backoff,
+                   cache_dir=cache_dir, cache_max_age=cache_max_age)
+            for name, mal_id in series_info
+        ]
         self.all_episodes = []
         self.include_filler = include_filler
+        self.wiki_url = wiki_url or FANDOM_URL.format(slug=self.name.lower().replace(" ", "-"))
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_dir = cache_dir
+        self.cache_max_age = cache_max_age
+        wiki_format = WIKI_FORMATS.get(name, {})
+        self.links = links or wiki_format.get("links")
+        self.layout = layout or wiki_format.get("layout")
 
-    def fetch_all_episodes(self, debug=False):
+    def fetch_all_episodes(self, debug=False, refresh=False):
         """
-        Fetch episodes for all series, filter by filler preference, and store them in the all_episodes attribute.
+        Fetch episodes for all series, with their filler status, and store them in the all_episodes attribute.
+
+        Args:
+            refresh (bool): Fetch the episode lists again even if they are cached.
         """
         offset = 0
 
         for series in self.series_list:
-            series.fetch_episodes(offset, debug=debug)
+            series.fetch_episodes(offset, debug=debug, refresh=refresh)
             self.all_episodes.extend(series.episodes)
             if series.episodes:
                 offset = series.episodes[-1]["episode_number"]
@@ -107,17 +223,19 @@ class Anime:
         """
         Generate URLs for each episode for the Fandom Wiki or any source.
         """
-        base_url = f"https://{self.name.lower().replace(" ", "-")}.fandom.com/wiki/"
-        if self.name == "Naruto":
+        base_url = self.wiki_url
+        if self.links == "title":
             base_url = f"{base_url}"
             episode_urls = [
-                {"episode": f"Episode {ep['episode_number']}", "url": f"{base_url}{self.make_link(ep['title'])}"}
+                {"episode": f"Episode {ep['episode_number']}", "url": f"{base_url}{self.make_link(ep['title'])}",
+                 "filler": ep.get("filler", False)}
                 for ep in self.all_episodes
             ]
-        elif self.name == "Jujutsu Kaisen":
+        elif self.links == "number":
             base_url = f"{base_url}Episode_"
             episode_urls = [
-                {"episode": f"Episode {ep['episode_number']}", "url": f"{base_url}{ep['episode_number']}"}
+                {"episode": f"Episode {ep['episode_number']}", "url": f"{base_url}{ep['episode_number']}",
+                 "filler": ep.get("filler", False)}
                 for ep in self.all_episodes
             ]
         else:
@@ -134,15 +252,37 @@ class Anime:
         Returns:
             list: A list of characters appearing in the episode.
         """
-        response = requests.get(episode_url)
+        response = fetch(episode_url, retries=self.retries, backoff=self.backoff,
+                         cache_dir=self.cache_dir, cache_max_age=self.cache_max_age)
         if response.status_code != 200:
             print(Fore.YELLOW + f"[WARNING]Failed to fetch episode page {episode_url}: {response.status_code}")
             print(Style.RESET_ALL)
             return []
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        characters = self.parse_episode_characters(response.text, deep_debug=deep_debug)
+        if debug or deep_debug:
+            if characters==['']:
+                print(f"\n[WARNING] No characters found in episode {episode_url}\n")
+            else:
+                print(f"[DEBUG] Characters in episode {episode_url}: {characters}")
+        return characters
+
+    @profiled("html_parse")
+    def parse_episode_characters(self, page, deep_debug=False):
+        """
+        Extract the characters from an episode page.
+
+        Args:
+            page (str): The HTML of the episode page.
+
+        Returns:
+            list: A list of characters appearing in the episode.
+        """
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page, "html.parser")
         characters = []
-        if self.name == "Naruto":
+        if self.layout == "table":
             tbodies = soup.find_all("tbody")  # Find all tbody elements
             for tbody in tbodies:
                 if deep_debug:
@@ -166,7 +306,7 @@ class Anime:
                         character_name = link.text.strip() if link else first_column.text.strip()
                         characters.append(character_name)
                         
-        elif self.name == "Jujutsu Kaisen":
+        elif self.layout == "list":
             heading = soup.find("span", id="Characters_in_Order_of_Appearance")
             if heading:
                 h2 = heading.find_parent("h2")
@@ -186,30 +326,39 @@ class Anime:
                 print("Heading 'Characters in Order of Appearance' not found.")
         else:
             raise NotImplementedError(f"Character scraping is not implemented for {self.name}.")
-        if debug or deep_debug:
-            if characters==['']:
-                print(f"\n[WARNING] No characters found in episode {episode_url}\n")
-            else:
-                print(f"[DEBUG] Characters in episode {episode_url}: {characters}")
         return characters
 
-    def save_episodes(self, csv_file_path="./data/episodes.csv", limit=None, debug_ep=False, debug_ch=False):
+    def save_episodes(self, csv_file_path="./data/episodes.csv", limit=None, debug_ep=False, debug_ch=False, workers=1,
+                      refresh=False):
         """
-        Save all episodes and characters to a CSV file.
+        Save all episodes, their characters and whether they are filler (1) or canon (0) to a CSV file.
 
         Args:
             csv_file_path (str): Path to the output CSV file.
             limit (int): Limit the number of episodes processed.
+            workers (int): Number of episode pages fetched concurrently.
+            refresh (bool): Fetch the episode lists again even if they are cached (episode pages still come
+                            from the cache until they are older than cache_max_age).
         """
-        self.fetch_all_episodes(debug=debug_ep)
-        episode_urls = self.get_episode_urls()
-        with open(csv_file_path, mode="w", newline="", encoding="utf-8") as file:
-            csv_writer = csv.writer(file)
-            csv_writer.writerow(["Episode", "Characters"])
-
-            for ep in episode_urls[:limit]:
-                characters = self.get_episode_characters(ep["url"], debug=debug_ch)
-                csv_writer.writerow([ep["episode"], ", ".join(characters)])
+        self.fetch_all_episodes(debug=debug_ep, refresh=refresh)
+        episode_urls = self.get_episode_urls()[:limit]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # map keeps the episode order regardless of which page finishes first
+            all_characters = pool.map(lambda ep: self.get_episode_characters(ep["url"], debug=debug_ch), episode_urls)
+
+            # Write then rename, so an interrupted scrape never leaves a truncated file behind
+            temp_path = f"{csv_file_path}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, mode="w", newline="", encoding="utf-8") as file:
+                    csv_writer = csv.writer(file)
+                    csv_writer.writerow(["Episode", "Characters", "Filler"])
+
+                    for ep, characters in zip(episode_urls, all_characters):
+                        csv_writer.writerow([ep["episode"], ", ".join(characters), int(ep["filler"])])
+                os.replace(temp_path, csv_file_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
 
         print(f"Data has been saved to {csv_file_path}")
 
@@ -0,0 +1,346 @@
+'''
+Array-backed (CSR) character graph.
+
+Stores the weighted, undirected graph as compressed sparse rows: the neighbors of node i are
+indices[indptr[i]:indptr[i + 1]] (sorted), with their weights at the same positions. Every edge is
+stored in both directions. Built straight from the kernels' weight matrices, it answers the Analysis
+metrics with array operations:
+
+- degree and popularity (weighted degree) are bincounts over the rows,
+- all-pairs BFS is bit-parallel: 64 sources advance one level per OR of their neighbors' frontier words,
+- clustering counts triangles as popcounts of ANDed neighbor bitsets,
+- connected components come from min-label propagation.
+
+to_networkx() builds the equivalent networkx graph for what still needs one (Louvain, PyVis).
+'''
+import networkx as nx
+import numpy as np
+from Appearances import WORD_BITS, popcount
+
+
+# Words gathered at once by the bit-parallel passes, to bound the temporary arrays (~32 MB)
+BLOCK_WORDS = 1 << 22
+
+
+class CSRGraph:
+    """
+    Weighted undirected graph in compressed sparse row form. Treat it as read-only.
+
+    Attributes:
+        nodes (List[str]): Node names, in row order.
+        indptr (np.ndarray): Row i's entries are indptr[i]:indptr[i + 1].
+        indices (np.ndarray): Neighbor of each entry, sorted within each row.
+        weights (np.ndarray): Weight of each entry.
+        attributes (Dict[str, np.ndarray]): Other edge attributes (e.g. extra kernels), per entry.
+    """
+    def __init__(self, nodes, indptr, indices, weights, attributes=None):
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.attributes = attributes or {}
+
+    @classmethod
+    def from_weight_matrix(cls, nodes, weights, mask=None, attributes=None):
+        """
+        Build the graph from a symmetric nodes x nodes weight matrix.
+
+        Args:
+            nodes (Iterable[str]): Node names, in matrix order.
+            weights (np.ndarray): Symmetric weight matrix.
+            mask (np.ndarray): Symmetric boolean matrix of the edges to keep (default: every pair, as a complete graph).
+            attributes (Dict[str, np.ndarray]): Other symmetric matrices stored as edge attributes.
+
+        Returns:
+            CSRGraph: The graph (no self-loops).
+        """
+        nodes = list(nodes)
+        keep = ~np.eye(len(nodes), dtype=bool)
+        if mask is not None:
+            keep &= mask
+        rows, cols = np.nonzero(keep)
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(nodes)), out=indptr[1:])
+        attributes = {name: np.asarray(matrix)[rows, cols] for name, matrix in (attributes or {}).items()}
+        return cls(nodes, indptr, cols.astype(np.int32), np.asarray(weights, dtype=np.float64)[rows, cols], attributes)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """
+        Build the graph from a networkx graph (missing weights count as 1, like networkx).
+        """
+        nodes = list(graph.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        names = []
+        for _, _, data in graph.edges(data=True):
+            names += [name for name in data if name != "weight" and name not in names]
+
+        rows, cols, columns = [], [], {"weight": []}
+        columns.update({name: [] for name in names})
+        for u, v, data in graph.edges(data=True):
+            rows.append(index[u])
+            cols.append(index[v])
+            columns["weight"].append(data.get("weight", 1))
+            for name in names:
+                columns[name].append(data.get(name, np.nan))
+
+        rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+        # Both directions, sorted by row then neighbor
+        both_rows, both_cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+        order = np.lexsort((both_cols, both_rows))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(both_rows, minlength=len(nodes)), out=indptr[1:])
+        values = {name: np.tile(np.array(column, dtype=np.float64), 2)[order] for name, column in columns.items()}
+        weights = values.pop("weight")
+        return cls(nodes, indptr, both_cols[order].astype(np.int32), weights, values)
+
+    def to_networkx(self):
+        """
+        Build the equivalent networkx graph, with the same nodes, weights and edge attributes.
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        rows, cols = self._entry_rows(), self.indices
+        upper = np.flatnonzero(rows < cols)
+        columns = {"weight": self.weights[upper].tolist()}
+        columns.update({name: values[upper].tolist() for name, values in self.attributes.items()})
+        names = list(columns)
+        graph.add_edges_from(
+            (self.nodes[i], self.nodes[j], dict(zip(names, values)))
+            for i, j, *values in zip(rows[upper].tolist(), cols[upper].tolist(), *columns.values())
+        )
+        return graph
+
+    # Structure
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __repr__(self):
+        return f"CSRGraph({self.number_of_nodes()} nodes, {self.number_of_edges()} edges)"
+
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def _entry_rows(self):
+        return np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+
+    def _node(self, node):
+        if node not in self.index:
+            raise ValueError(f"Character '{node}' not found in the network.")
+        return self.index[node]
+
+    def edges(self):
+        """
+        Every edge once.
+
+        Returns:
+            np.ndarray: First endpoint (row index) of each edge.
+            np.ndarray: Second endpoint (row index, greater than the first).
+            np.ndarray: Weight of each edge.
+        """
+        rows = self._entry_rows()
+        upper = rows < self.indices
+        return rows[upper], self.indices[upper].astype(np.int64), self.weights[upper]
+
+    def weight(self, u, v):
+        """
+        Weight of the edge between u and v (KeyError if there is none).
+        """
+        i, j = self._node(u), self._node(v)
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        position = start + np.searchsorted(self.indices[start:stop], j)
+        if position == stop or self.indices[position] != j:
+            raise KeyError((u, v))
+        return float(self.weights[position])
+
+    def neighbors(self, node):
+        """
+        Neighbors of a node and the weights of the edges to them.
+
+        Returns:
+            List[Tuple[str, float]]: (neighbor, weight) pairs, in row order.
+        """
+        i = self._node(node)
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return [(self.nodes[j], w) for j, w in zip(self.indices[start:stop].tolist(), self.weights[start:stop].tolist())]
+
+    def threshold(self, min_weight):
+        """
+        A new graph with only the edges of weight >= min_weight (all nodes are kept).
+        """
+        keep = self.weights >= min_weight
+        indptr = np.zeros_like(self.indptr)
+        np.cumsum(np.bincount(self._entry_rows()[keep], minlength=len(self.nodes)), out=indptr[1:])
+        attributes = {name: values[keep] for name, values in self.attributes.items()}
+        return CSRGraph(self.nodes, indptr, self.indices[keep], self.weights[keep], attributes)
+
+    # Degree
+
+    def degree(self):
+        """
+        Number of neighbors of every node, in row order.
+        """
+        return np.diff(self.indptr)
+
+    def weighted_degree(self):
+        """
+        Sum of the edge weights of every node (its popularity), in row order.
+        """
+        return np.bincount(self._entry_rows(), weights=self.weights, minlength=len(self.nodes))
+
+    # Paths
+
+    def bfs(self, source):
+        """
+        Breadth-first search from one node.
+
+        Returns:
+            np.ndarray: Hop distance of every node from the source (-1 if unreachable).
+            np.ndarray: BFS-tree parent of every node (-1 for the source and unreachable nodes).
+        """
+        distances = np.full(len(self.nodes), -1, dtype=np.int64)
+        parents = np.full(len(self.nodes), -1, dtype=np.int64)
+        distances[source] = 0
+        frontier = np.array([source])
+        level = 0
+        while frontier.size:
+            level += 1
+            starts, counts = self.indptr[frontier], np.diff(self.indptr)[frontier]
+            entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            reached, via = self.indices[entries], np.repeat(frontier, counts)
+            new = distances[reached] < 0
+            frontier, first = np.unique(reached[new], return_index=True)
+            distances[frontier] = level
+            parents[frontier] = via[new][first]
+        return distances, parents
+
+    def _path(self, parents, target):
+        path = [target]
+        while parents[path[-1]] >= 0:
+            path.append(parents[path[-1]])
+        return [self.nodes[i] for i in reversed(path)]
+
+    def shortest_path(self, source, target):
+        """
+        A shortest (fewest hops) path between two nodes.
+
+        Returns:
+            List[str]: The path from source to target, or None if they are not connected.
+        """
+        i, j = self._node(source), self._node(target)
+        distances, parents = self.bfs(i)
+        return self._path(parents, j) if distances[j] >= 0 else None
+
+    def distance_profile(self):
+        """
+        Bit-parallel BFS from every node at once.
+
+        Row v of the frontier holds one bit per source, set once the source has reached v, and each level
+        ORs the neighbors' frontier words together. Since the graph is undirected, the bits reaching v at
+        level k count the nodes at distance k from v.
+
+        Returns:
+            np.ndarray: Eccentricity of every node within its component.
+            np.ndarray: Sum of the distances from every node to the nodes it can reach.
+            np.ndarray: Number of nodes every node can reach, itself included.
+        """
+        num_nodes = len(self.nodes)
+        eccentricity = np.zeros(num_nodes, dtype=np.int64)
+        totals = np.zeros(num_nodes, dtype=np.int64)
+        reached = np.ones(num_nodes, dtype=np.int64)
+        nonempty = np.flatnonzero(np.diff(self.indptr) > 0)
+        starts = self.indptr[:-1][nonempty]
+        num_words = -(-num_nodes // WORD_BITS)
+        block = max(1, BLOCK_WORDS // max(1, len(self.indices)))
+
+        for first_word in range(0, num_words, block):
+            # The sources of this block of words, one bit each
+            words = min(block, num_words - first_word)
+            sources = np.arange(first_word * WORD_BITS, min(num_nodes, (first_word + words) * WORD_BITS))
+            visited = np.zeros((num_nodes, words), dtype=np.uint64)
+            bits = sources - first_word * WORD_BITS
+            visited[sources, bits // WORD_BITS] = np.left_shift(np.uint64(1), (bits % WORD_BITS).astype(np.uint64))
+            frontier = visited.copy()
+            level = 0
+            while True:
+                level += 1
+                advanced = np.zeros_like(frontier)
+                if len(nonempty):
+                    advanced[nonempty] = np.bitwise_or.reduceat(frontier[self.indices], starts, axis=0)
+                advanced &= ~visited
+                new = popcount(advanced).sum(axis=1, dtype=np.int64)
+                if not new.any():
+                    break
+                visited |= advanced
+                frontier = advanced
+                # Other blocks of sources may already have reached further
+                np.maximum(eccentricity, np.where(new > 0, level, 0), out=eccentricity)
+                totals += new * level
+                reached += new
+        return eccentricity, totals, reached
+
+    # Components
+
+    def connected_components(self):
+        """
+        Connected components, by propagating the smallest row index through every component.
+
+        Returns:
+            List[Set[str]]: The components, largest first.
+        """
+        labels = np.arange(len(self.nodes))
+        rows = self._entry_rows()
+        while True:
+            smallest = labels.copy()
+            np.minimum.at(smallest, rows, labels[self.indices])
+            smallest = smallest[smallest]  # Jump to the label's own label
+            if np.array_equal(smallest, labels):
+                break
+            labels = smallest
+        components = {}
+        for node, label in zip(self.nodes, labels.tolist()):
+            components.setdefault(label, set()).add(node)
+        return sorted(components.values(), key=len, reverse=True)
+
+    def is_connected(self):
+        if not self.nodes:
+            raise ValueError("Connectivity is undefined for an empty graph.")
+        return len(self.connected_components()) == 1
+
+    # Clustering
+
+    def _adjacency_bits(self):
+        num_words = -(-len(self.nodes) // WORD_BITS)
+        adjacency = np.zeros((len(self.nodes), num_words), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), (self.indices % WORD_BITS).astype(np.uint64))
+        np.bitwise_or.at(adjacency, (self._entry_rows(), self.indices // WORD_BITS), bits)
+        return adjacency
+
+    def clustering(self):
+        """
+        Unweighted clustering coefficient of every node: the fraction of pairs of its neighbors that are
+        connected (0 for nodes with fewer than two neighbors), as in networkx.clustering.
+        """
+        adjacency = self._adjacency_bits()
+        rows = self._entry_rows()
+        # Summed over a node's neighbors, the common neighbors count each triangle twice
+        shared = np.zeros(len(self.nodes), dtype=np.int64)
+        block = max(1, BLOCK_WORDS // max(1, adjacency.shape[1]))
+        for start in range(0, len(self.indices), block):
+            stop = start + block
+            common = popcount(adjacency[rows[start:stop]] & adjacency[self.indices[start:stop]]).sum(axis=1)
+            shared += np.bincount(rows[start:stop], weights=common, minlength=len(self.nodes)).astype(np.int64)
+        degree = self.degree()
+        pairs = degree * (degree - 1)
+        return np.divide(shared, pairs, out=np.zeros(len(self.nodes)), where=pairs > 0)
@@ -0,0 +1,171 @@
+'''
+Relationship-weight kernels.
+
+Each kernel turns the character x episode incidence matrix into a full character x character weight
+matrix with a handful of matrix operations. Intermediates shared between kernels (co-occurrence
+counts, appearance counts, order-discounted appearances) are computed once per KernelContext, so
+several kernels can be computed in the same pass.
+
+New kernels are registered with @register_kernel("name") and receive the KernelContext.
+'''
+from functools import cached_property
+import numpy as np
+from Appearances import AppearanceMatrix
+
+
+# Registered kernels, by name
+KERNELS = {}
+
+
+def register_kernel(name):
+    """
+    Decorator registering `function(context) -> np.ndarray` as the kernel `name`.
+    """
+    def decorator(function):
+        KERNELS[name] = function
+        return function
+    return decorator
+
+
+class KernelContext:
+    """
+    Lazily computed intermediates for one incidence matrix, shared by all kernels computed on it.
+
+    Attributes:
+        appearances (AppearanceMatrix): Packed characters x episodes appearances.
+        order (np.ndarray): The 1-based position of the character in the episode's order of appearance,
+                            either one value per appearance (see AppearanceMatrix.expand) or a characters
+                            x episodes matrix with 0 where absent; None if unknown.
+    """
+    def __init__(self, incidence, order=None):
+        if not isinstance(incidence, AppearanceMatrix):
+            incidence = AppearanceMatrix.from_dense(range(len(incidence)), incidence)
+        self.appearances = incidence
+        self.order = None if order is None else np.asarray(order)
+
+    @cached_property
+    def num_episodes(self):
+        return self.appearances.num_episodes
+
+    @cached_property
+    def co_occurrence(self):
+        """
+        Number of episodes shared by every pair of characters.
+        """
+        return self.appearances.co_occurrence().astype(np.float64)
+
+    @cached_property
+    def counts(self):
+        """
+        Number of episodes each character appears in.
+        """
+        return self.appearances.counts().astype(np.float64)
+
+    @cached_property
+    def pmi(self):
+        """
+        Pointwise mutual information of the appearances, -inf (log 0) for pairs that never share an episode.
+        """
+        expected = np.outer(self.counts, self.counts)
+        ratio = _divide(self.co_occurrence * self.num_episodes, expected)
+        return np.log(ratio, out=np.full_like(ratio, -np.inf), where=ratio > 0)
+
+    @cached_property
+    def discounted(self):
+        """
+        Incidence discounted by order of appearance: 1 / log2(1 + position), so a character opening
+        an episode counts fully and one introduced late counts less.
+        """
+        if self.order is None:
+            raise ValueError("This kernel needs the characters' order of appearance in each episode.")
+        order = self.order
+        if order.ndim == 1:
+            # Positions are kept only for appearances; densify them just for this kernel
+            order = self.appearances.expand(order)
+        order = order.astype(np.float64)
+        return np.divide(1.0, np.log2(1.0 + order), out=np.zeros_like(order), where=order > 0)
+
+
+def _divide(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64), where=denominator != 0)
+
+
+@register_kernel("overlap")
+def overlap(context):
+    """
+    Shared episodes divided by the larger of the two appearance counts.
+    """
+    return _divide(context.co_occurrence, np.maximum.outer(context.counts, context.counts))
+
+
+@register_kernel("jaccard")
+def jaccard(context):
+    """
+    Shared episodes divided by the episodes either character appears in.
+    """
+    union = np.add.outer(context.counts, context.counts) - context.co_occurrence
+    return _divide(context.co_occurrence, union)
+
+
+@register_kernel("cosine")
+def cosine(context):
+    """
+    Cosine similarity of the two appearance vectors.
+    """
+    return _divide(context.co_occurrence, np.sqrt(np.outer(context.counts, context.counts)))
+
+
+@register_kernel("pmi")
+def pmi(context):
+    """
+    Pointwise mutual information, log(P(i, j) / (P(i) P(j))) over episodes.
+
+    Pairs that never share an episode get -inf; as the edge weight, network() leaves pairs with a negative
+    PMI, those included, unconnected.
+    """
+    return context.pmi
+
+
+@register_kernel("npmi")
+def npmi(context):
+    """
+    PMI normalized to [-1, 1] by -log P(i, j); 1 for characters that always appear together
+    and -1 for characters that never do.
+    """
+    joint = context.co_occurrence / context.num_episodes
+    normalizer = -np.log(joint, out=np.zeros_like(joint), where=joint > 0)
+    always_together = (joint > 0) & (normalizer == 0)
+    normalized = np.where(always_together, 1.0, _divide(context.pmi, normalizer))
+    return np.where(joint == 0, -1.0, normalized)
+
+
+@register_kernel("order_discounted")
+def order_discounted(context):
+    """
+    Cosine similarity of the order-discounted appearance vectors, so pairs that both appear early in
+    the same episodes weigh more than pairs that only share late cameos.
+    """
+    weighted = context.discounted @ context.discounted.T
+    norms = np.sqrt(weighted.diagonal())
+    return _divide(weighted, np.outer(norms, norms))
+
+
+def compute_kernels(incidence, kernels=("overlap",), order=None):
+    """
+    Compute several relationship-weight kernels over the same incidence matrix in one pass.
+
+    Args:
+        incidence (AppearanceMatrix | np.ndarray): Characters x episodes appearances (packed, or a 0/1 matrix).
+        kernels (Iterable[str]): Names of registered kernels.
+        order (np.ndarray): Order of appearance, per appearance or characters x episodes
+                            (needed by order_discounted).
+
+    Returns:
+        Dict[str, np.ndarray]: A characters x characters weight matrix per kernel.
+    """
+    unknown = [name for name in kernels if name not in KERNELS]
+    if unknown:
+        raise ValueError(f"Unknown kernel(s) {unknown}. Available: {sorted(KERNELS)}")
+
+    context = KernelContext(incidence, order)
+    return {name: KERNELS[name](context) for name in kernels}
@@ -5,14 +5,14 @@ Add and check meta data
 '''
 import csv
 import os
-from DataCollection import Anime
-import matplotlib.pyplot as plt
-import numpy as np
 import networkx as nx
-from tqdm import tqdm
+import numpy as np
 from data.Constants import NARUTO, JJK, NETWORK_FILE
 import pickle
-from pyvis.network import Network
+from Appearances import AppearanceMatrix
+from Graphs import CSRGraph
+from Kernels import compute_kernels
+from Profiling import PROFILER, profiled
 
 
 
@@ -22,25 +22,74 @@ class Anime_Network:
         self.cutoff_weight = None
         self.percentage_removed = None
         self.characters_episodes = {}
-        self.anime_network = None
+        self.appearance_order = None
+        self.episode_filler = []
+        self.graph = None
+        self._networkx = (None, None)
         self.anime = anime
+        self.kernel = "overlap"
+        self.include_filler = True
+
+    @property
+    def anime_network(self):
+        """
+        The graph as a read-only networkx.Graph, built from the CSR graph the first time it is asked for.
 
-    def preProcessing(self, save_results=False):
+        It is a frozen copy: adding or removing nodes and edges raises a NetworkXError instead of being
+        silently lost. To change the network, edit a copy (`nx.Graph(network.anime_network)`) and assign it
+        back to `anime_network`.
+        """
+        graph, networkx_graph = self._networkx
+        if graph is not self.graph:
+            networkx_graph = None if self.graph is None else nx.freeze(self.graph.to_networkx())
+            self._networkx = (self.graph, networkx_graph)
+        return networkx_graph
+
+    @anime_network.setter
+    def anime_network(self, networkx_graph):
+        self.graph = None if networkx_graph is None else CSRGraph.from_networkx(networkx_graph)
+        # The frozen view is rebuilt from the CSR graph, so later edits to the caller's graph are not picked up
+        self._networkx = (None, None)
+
+    def __getstate__(self):
+        # The networkx graph is rebuilt on demand, so it is not pickled
+        state = dict(self.__dict__)
+        state["_networkx"] = (None, None)
+        return state
+
+    def __setstate__(self, state):
+        # Networks saved before the CSR graph pickled the networkx graph itself
+        networkx_graph = state.pop("anime_network", None)
+        state.setdefault("graph", None)
+        state.setdefault("_networkx", (None, None))
+        self.__dict__.update(state)
+        if networkx_graph is not None:
+            self.anime_network = networkx_graph
+
+    @profiled("preProcessing")
+    def preProcessing(self, save_results=False, episodes_file="./data/episodes.csv",
+                      characters_file="./data/characters.csv"):
         """
         Process the episodes CSV file and generate a binary representation of characters' appearances per episode.
+        Filler status is read per episode (optional Filler column) and applied later, when the network is built.
 
         Args:
             save_results (bool): Whether to save the resulting dictionary to a CSV file.
+            episodes_file (str): Path to the episodes CSV, scraped via the anime if missing.
+            characters_file (str): Path of the characters CSV written when save_results is set.
 
         Saves:
             A CSV file where each row represents a character and their binary appearances across episodes.
         """
-        # Step 1: Read the input CSV and extract episode and character data
+        # Step 1: Read the input CSV and extract episode, character and filler data
         all_episode_characters = {}
-        if not os.path.exists("./data/episodes.csv"):
-            self.anime.save_episodes()
+        all_episode_filler = {}
+        if not os.path.exists(episodes_file):
+            self.anime.save_episodes(csv_file_path=episodes_file)
+        else:
+            PROFILER.count("episodes_csv_cache_hits")
 
-        with open("./data/episodes.csv", mode="r", encoding="utf-8") as file:
+        with open(episodes_file, mode="r", encoding="utf-8") as file:
             csv_reader = csv.reader(file)
             next(csv_reader)  # Skip the header
             for row in csv_reader:
@@ -48,37 +97,89 @@ class Anime_Network:
                 characters = row[1].split(", ") if row[1].strip() else []  # Handle empty character lists
                 if characters:  # Skip episodes with no characters
                     all_episode_characters[episode] = characters
+                    # Older files have no Filler column: every episode counts as canon
+                    all_episode_filler[int(episode.split("Episode ")[1])] = len(row) > 2 and row[2].strip() == "1"
 
         # Step 2: Get a sorted list of all episode numbers
         all_episode_numbers = sorted(
             int(episode.split("Episode ")[1]) for episode in all_episode_characters.keys()
         )
+        self.episode_filler = [all_episode_filler[number] for number in all_episode_numbers]
 
-        # Step 3: Create a dictionary to store binary representation for each character
+        # Step 3: Record the position at which each character first appears in each episode
+        episode_index = {number: i for i, number in enumerate(all_episode_numbers)}
+        character_index = {}
+        rows, columns, positions = [], [], []
         for episode, characters in all_episode_characters.items():
-            episode_number = int(episode.split("Episode ")[1])
-            for character in characters:
-                if character not in self.characters_episodes:
-                    self.characters_episodes[character] = [0] * len(all_episode_numbers)
-                # Mark the character as present (1) in the current episode
-                self.characters_episodes[character][all_episode_numbers.index(episode_number)] = 1
-
-        # Step 4: Filter out characters who appear in fewer than three episodes
-        filtered_characters_episodes = {
-            character: appearances
-            for character, appearances in self.characters_episodes.items()
-            if sum(appearances) >= 3
-        }
-        self.characters_episodes = filtered_characters_episodes
+            column = episode_index[int(episode.split("Episode ")[1])]
+            seen = set()
+            for position, character in enumerate(characters, start=1):
+                if character in seen:
+                    continue
+                seen.add(character)
+                rows.append(character_index.setdefault(character, len(character_index)))
+                columns.append(column)
+                positions.append(position)
+        order = np.zeros((len(character_index), len(all_episode_numbers)), dtype=np.uint16)
+        order[rows, columns] = positions
+
+        # Step 4: Filter out characters who appear in fewer than three episodes, and pack the
+        # binary representation of the others into bits (present (1) in an episode where order > 0).
+        # Positions are only kept for appearances, in the same row-major order as the bits
+        keep = (order > 0).sum(axis=1) >= 3
+        characters = [character for character, kept in zip(character_index, keep) if kept]
+        order = order[keep]
+        self.characters_episodes = AppearanceMatrix.from_dense(characters, order > 0)
+        self.appearance_order = order[order > 0]
 
         # Step 5: Save the results if requested
         if save_results:
-            with open("./data/characters.csv", mode="w", newline="", encoding="utf-8") as file:
+            with open(characters_file, mode="w", newline="", encoding="utf-8") as file:
                 csv_writer = csv.writer(file)
                 for character, appearances in self.characters_episodes.items():
                     csv_writer.writerow([character] + appearances)
 
-    def network(self, trimmed=True, save=True):
+    def incidence_matrix(self, include_filler=True):
+        """
+        Get the characters' appearances and order of appearance as matrices.
+
+        Args:
+            include_filler (bool): If False, mask out filler episodes and drop characters left with fewer
+                                   than three appearances.
+
+        Returns:
+            List[str]: The characters, in row order.
+            AppearanceMatrix: Packed characters x episodes appearances.
+            np.ndarray: Order of appearance, one position per appearance in the order of
+                        AppearanceMatrix.expand, or None if it was not recorded (networks saved before it was).
+        """
+        appearances = self.characters_episodes
+        if not isinstance(appearances, AppearanceMatrix):
+            # Networks saved with one list per character
+            appearances = AppearanceMatrix.from_lists(appearances)
+        order = getattr(self, "appearance_order", None)
+        if isinstance(order, np.ndarray) and order.shape == (len(appearances), appearances.num_episodes):
+            # Networks saved with a dense characters x episodes order
+            order = order[order > 0]
+        if not isinstance(order, np.ndarray) or order.shape != (int(appearances.counts().sum()),):
+            order = None
+
+        filler = np.array(getattr(self, "episode_filler", []), dtype=bool)
+        if not include_filler and filler.any():
+            canon = ~filler
+            present = appearances.to_dense(bool)
+            appearances = appearances.select(episodes=canon)
+            keep = appearances.counts() >= 3
+            appearances = appearances.select([character for character, kept in zip(appearances, keep) if kept])
+            if order is not None:
+                # Positions of the canon appearances of the kept characters
+                selected = np.zeros_like(present)
+                selected[np.ix_(keep, canon)] = True
+                order = order[selected[present]]
+        return appearances.characters, appearances, order
+
+    @profiled("network")
+    def network(self, trimmed=True, save=True, kernel="overlap", extra_kernels=(), include_filler=None):
         """
         Build a graph where nodes represent characters and edges represent relationships
         based on their appearances in episodes.
@@ -86,28 +187,42 @@ class Anime_Network:
         Args:
             trimmed (bool): If True, trim the graph using max_cutoff_for_connected_graph to remove weaker edges 
                             while keeping the graph connected.
+            kernel (str): Relationship-weight kernel stored as the edges' `weight` (see Kernels.KERNELS).
+                          The default, "overlap", is shared episodes divided by the larger appearance count.
+            extra_kernels (Iterable[str]): More kernels computed in the same pass, stored as edge attributes
+                                           named after the kernel.
+            include_filler (bool): Whether filler episodes count (default: the anime's include_filler).
+                                   Switching only re-masks the preprocessed data, nothing is scraped again.
+
+        Raises a ValueError if no character is left to build the graph from, e.g. when no character
+        appears in three canon episodes; the previous graph is kept.
         """
         if not self.characters_episodes:
             print("No character data found. Please run preProcessing first.")
             return
 
-        # Initialize the graph
-        self.anime_network = nx.Graph()
-
-        # Add nodes for each character
-        for character in self.characters_episodes.keys():
-            self.anime_network.add_node(character)
-
-        # Add edges with weights (dot products) between all pairs of characters
-        characters = list(self.characters_episodes.keys())
-        for i, char1 in tqdm(enumerate(characters), desc="Building Graph"):
-            for j, char2 in enumerate(characters):
-                if i < j:  # Avoid duplicate edges and self-loops
-                    # Compute the dot product of their episode lists
-                    weight = np.dot(
-                        self.characters_episodes[char1], self.characters_episodes[char2]
-                    ) / max(sum(self.characters_episodes[char1]), sum(self.characters_episodes[char2]))
-                    self.anime_network.add_edge(char1, char2, weight=weight)
+        if include_filler is None:
+            include_filler = getattr(self.anime, "include_filler", True)
+
+        # Compute the weights between all pairs of characters as matrix operations
+        with PROFILER.stage("weight_computation"):
+            characters, incidence, order = self.incidence_matrix(include_filler)
+            if not characters:
+                episodes = "episodes" if include_filler else "canon episodes"
+                raise ValueError(f"No character appears in at least three {episodes}; there is no network to build.")
+            kernels = [kernel] + [name for name in extra_kernels if name != kernel]
+            weights = compute_kernels(incidence, kernels, order)
+
+        # Build the graph with edges between all pairs of characters, straight from the weight matrices.
+        # Pairs with a negative or infinite weight (PMI and NPMI of characters seen together less often than
+        # by chance, or never) are left unconnected: Louvain and popularity need non-negative weights
+        with PROFILER.stage("graph_build"):
+            self.graph = CSRGraph.from_weight_matrix(
+                characters, weights[kernel], mask=np.isfinite(weights[kernel]) & (weights[kernel] >= 0),
+                attributes={name: weights[name] for name in kernels[1:]}
+            )
+        self.kernel = kernel
+        self.include_filler = include_filler
 
         # Trim the graph if required
         if trimmed:
@@ -118,44 +233,61 @@ class Anime_Network:
         if save:
             self.save_network()
 
+    @profiled("trimming")
     def max_cutoff_for_connected_graph(self):
         """
         Calculate the maximum weight cutoff such that removing all edges with weight <= cutoff
         keeps the graph connected but not fully connected, and update the graph accordingly.
+
+        Edges are added back from the strongest down with a union-find until every character is connected;
+        the weight of the edge that connects the last two components is the bottleneck, and every weaker
+        edge is removed. This takes a single pass instead of a connectivity check per edge.
         Returns:
-            float: The maximum weight cutoff.
-            float: Percentage of edges removed.
-            nx.Graph: The updated graph with edges removed.
+            float: The maximum weight cutoff (None if there is no graph).
+            float: Percentage of edges removed (None if there is no graph).
         """
-        if not self.anime_network:
+        if not self.graph:
             print("No network data found. Please run network first.")
-            return None, None, None
-        # Sort edges by weight in ascending order
-        edges_sorted = sorted(self.anime_network.edges(data=True), key=lambda x: x[2]["weight"])
-        total_edges = len(edges_sorted)
-        for i, (u, v, data) in enumerate(edges_sorted):
-            # Create a copy of the graph to test edge removal
-            graph_copy = self.anime_network.copy()
-            # Remove edges with weight <= current edge weight
-            edges_to_remove = [(x, y) for x, y, d in edges_sorted[:i + 1]]
-            graph_copy.remove_edges_from(edges_to_remove)
-            # Check if the graph is still connected
-            if not nx.is_connected(graph_copy):
-                # Return the weight of the last edge before disconnection
-                cutoff_weight = edges_sorted[i - 1][2]["weight"] if i > 0 else 0
-                edges_to_keep = [(x, y) for x, y, d in edges_sorted if d["weight"] > cutoff_weight]
-                updated_graph = self.anime_network.edge_subgraph(edges_to_keep).copy()
-                edges_removed = len(edges_to_remove) - 1
-                percentage_removed = (float(edges_removed) / float(total_edges)) * 100.00
-                # Update the main network graph
-                self.anime_network = updated_graph
-                self.cutoff_weight = cutoff_weight
-                self.percentage_removed = percentage_removed
-                return cutoff_weight, percentage_removed
-        # If all edges are removed and the graph is still connected
-        cutoff_weight = edges_sorted[-1][2]["weight"]
-        return cutoff_weight, 0
-    
+            return None, None
+        # Sort edges by weight in descending order
+        rows, cols, weights = self.graph.edges()
+        order = np.argsort(-weights, kind="stable")
+        total_edges = len(weights)
+
+        # Union-find over the characters, adding the strongest edges first
+        parent = list(range(len(self.graph)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        components = len(parent)
+        bottleneck = None
+        for u, v, weight in zip(rows[order].tolist(), cols[order].tolist(), weights[order].tolist()):
+            root_u, root_v = find(u), find(v)
+            if root_u != root_v:
+                parent[root_u] = root_v
+                components -= 1
+                if components == 1:
+                    bottleneck = weight
+                    break
+        if bottleneck is None:
+            # Not connected even with every edge, or no edges to remove
+            cutoff_weight = float(weights.max()) if total_edges else 0
+            return cutoff_weight, 0
+
+        # Keep every edge at least as strong as the bottleneck, ties included, so the graph stays connected
+        weaker = weights[weights < bottleneck]
+        cutoff_weight = float(weaker.max()) if len(weaker) else 0
+        percentage_removed = (float(len(weaker)) / float(total_edges)) * 100.00
+        # Update the main network graph
+        self.graph = self.graph.threshold(bottleneck)
+        self.cutoff_weight = cutoff_weight
+        self.percentage_removed = percentage_removed
+        return cutoff_weight, percentage_removed
+
     def display_network(self, min_edge=0, output_file="character_network.html"):
         """
         Visualize the character relationship network interactively using PyVis.
@@ -164,84 +296,26 @@ class Anime_Network:
             min_edge (float): The minimum weight for edges to be displayed.
             output_file (str): The filename for saving the HTML visualization.
         """
-        if not self.anime_network:
+        if not self.graph:
             print("No network data found. Please run network first.")
             return
 
-        # Create a new PyVis network
-        net = Network(notebook=False, cdn_resources="remote", height="750px", width="100%", bgcolor="#222222", font_color="white",
-                      select_menu=True, filter_menu=True)
-
-        # Set physics layout
-        net.barnes_hut()
-
-        # Filter edges by the minimum weight
-        filtered_edges = [
-            (u, v, d) for u, v, d in self.anime_network.edges(data=True) if d["weight"] >= min_edge
-        ]
-
-        # Add nodes and edges
-        for u, v, data in filtered_edges:
-            # Add nodes with titles
-            net.add_node(u, label=u, title=f"{u} (Node)")
-            net.add_node(v, label=v, title=f"{v} (Node)")
-
-            # Add edges with weights as labels
-            net.add_edge(u, v, value=data["weight"], label=f"Weight: {data['weight']:.2f}")
-
-        # Map neighbors to node hover data
-        neighbor_map = net.get_adj_list()
-        for node in net.nodes:
-            node["title"] += " Neighbors:<br>" + "<br>".join(neighbor_map[node["id"]])
-            node["value"] = len(neighbor_map[node["id"]])  # Set node size based on connections
-
-        # Display the network
-        net.save_graph(output_file)
-        print(f"Network visualization saved to {output_file}. Open it in a browser to view.")  
-        
+        import Visualization
+        Visualization.display_network(self.anime_network, min_edge=min_edge, output_file=output_file)
+
     def display_relationship(self):
         """
         Visualize the relationship between characters and their appearances across episodes using a heatmap.
         """
-        # Step 1: Extract characters and their binary appearance data
-        data = self.characters_episodes
-        if not data:
+        if not self.characters_episodes:
             print("No character data found. Please run preProcessing first.")
             return
 
-        characters = list(data.keys())
-        episodes = range(1, len(next(iter(data.values()))) + 1)
-        matrix = np.array([data[char] for char in characters])
-
-        # Step 2: Plot the heatmap
-        fig, ax = plt.subplots(figsize=(15, 12))
-        im = ax.imshow(matrix, cmap="Blues", aspect="auto")
-
-        # Set ticks and labels
-        ax.set_xticks(np.arange(len(episodes)))
-        ax.set_yticks(np.arange(len(characters)))
-        ax.set_xticklabels([f"{ep}" for ep in episodes], fontsize=8)
-        ax.set_yticklabels(characters, fontsize=6)
-
-        # Rotate the tick labels for better readability
-        plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
-
-        # Add a colorbar
-        plt.colorbar(im, label="Appearance (1 = Present, 0 = Absent)")
-
-        # Set titles and labels
-        plt.title("Character Appearances Across Episodes", fontsize=14)
-        plt.xlabel("Episodes", fontsize=12)
-        plt.ylabel("Characters", fontsize=12)
-
-        # Adjust layout for better spacing
-        plt.tight_layout()
-
-        # Show the heatmap
-        plt.show()
+        import Visualization
+        Visualization.display_relationship(self.characters_episodes)
 
     def relation_val(self, char1, char2):
-        return self.anime_network[char1][char2]['weight']
+        return self.graph.weight(char1, char2)
 
     def get_top_largest_edges(self, top_n=5):
         """
@@ -255,47 +329,56 @@ class Anime_Network:
             List[Tuple[str, str, int]]: A list of tuples where each tuple contains
                                         two nodes and the weight of the edge.
         """
-        # Extract edges with weights and sort by weight in descending order
-        edges = [(u, v, d["weight"]) for u, v, d in self.anime_network.edges(data=True)]
-        edges_sorted = sorted(edges, key=lambda x: x[2], reverse=True)
-
-        # Return the top `top_n` edges
-        return edges_sorted[:top_n]
+        # Sort edges by weight in descending order and take the top `top_n`
+        rows, cols, weights = self.graph.edges()
+        top = np.argsort(-weights, kind="stable")[:top_n]
+        nodes = self.graph.nodes
+        return [(nodes[u], nodes[v], w) for u, v, w in zip(rows[top].tolist(), cols[top].tolist(), weights[top].tolist())]
 
     def top_friends(self,character, top_n=5):
-        edges = [(u, v, d["weight"]) for u, v, d in self.anime_network.edges(character, data=True)]
+        edges = [(character, neighbor, weight) for neighbor, weight in self.graph.neighbors(character)]
         edges_sorted = sorted(edges, key=lambda x: x[2], reverse=True)
         return edges_sorted[:top_n]
 
-    def save_network(self):
+    @profiled("save_network")
+    def save_network(self, path=NETWORK_FILE):
         """
-        Save the graph and characters_episodes to a file using pickle.
+        Save the graph and characters_episodes to a file using pickle (the networkx view is not saved).
+
+        Args:
+            path (str): Destination of the pickled network (default: NETWORK_FILE).
         """
-        if not self.anime_network:
+        if not self.graph:
             print("No network to save. Please run network first.")
             return
         if not self.characters_episodes:
             print("No character data to save. Please run preProcessing first.")
             return
 
-        with open(NETWORK_FILE, 'wb') as f:
+        with open(path, 'wb') as f:
             pickle.dump(self, f)
-        print(f"Graph and character data saved to {NETWORK_FILE}")
+        print(f"Graph and character data saved to {path}")
 
     @staticmethod
-    def load_network():
+    @profiled("load_network")
+    def load_network(path=NETWORK_FILE):
         """
         Load the graph and characters_episodes from a file.
 
+        Args:
+            path (str): Location of the pickled network (default: NETWORK_FILE).
+
         Returns:
             Network: The loaded Network object.
         """
-        with open(NETWORK_FILE, 'rb') as f:
+        with open(path, 'rb') as f:
             data = pickle.load(f)
-        print(f"Graph and character data loaded from {NETWORK_FILE}")
+        print(f"Graph and character data loaded from {path}")
         return data
 
 if __name__ == "__main__":
+    from DataCollection import Anime
+
     # NARUTO
     anime = Anime("Naruto", NARUTO, include_filler=False)
     network = Anime_Network(anime)
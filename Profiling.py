@@ -0,0 +1,260 @@
+'''
+Stage-level instrumentation for the pipeline.
+
+Records wall time, call counts and (optionally) peak traced memory per stage, plus counters such as
+bytes fetched and cache hits, and writes everything as a JSON report. Disabled by default, in which
+case every hook costs a single attribute check.
+
+Usage:
+    from Profiling import PROFILER
+    PROFILER.enable(memory=True, cprofile=True, report_path="profile.json")
+
+or set ANIME_NETWORK_PROFILE=profile.json (plus ANIME_NETWORK_PROFILE_MEMORY=1 and
+ANIME_NETWORK_PROFILE_CPROFILE=1 if wanted) to profile any run of the scripts.
+'''
+import atexit
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class Profiler:
+    """
+    Collects per-stage timings and counters for one run.
+
+    Attributes:
+        enabled (bool): Whether stages and counters are recorded.
+        memory (bool): Whether peak memory per stage is traced with tracemalloc (slows the run down).
+        stages (dict): Per-stage calls, total/max seconds and peak bytes.
+        counters (Counter): Free-form counters, e.g. bytes_fetched or community_cache_hits.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.stages = {}
+        self.counters = Counter()
+        self.report_path = None
+        self._started = None
+        self._start_time = None
+        self._cprofile = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._atexit_registered = False
+        self._owns_tracemalloc = False
+        # Thread whose stages sample tracemalloc (its peak is process-wide, the stage stacks are per thread)
+        self._memory_thread = None
+
+    def enable(self, memory=False, cprofile=False, report_path=None):
+        """
+        Start recording.
+
+        Args:
+            memory (bool): Trace peak memory per stage with tracemalloc.
+            cprofile (bool): Run cProfile over the whole run and include its top functions in the report.
+            report_path (str): Write the JSON report there when the process exits.
+        """
+        self.reset()
+        self.enabled = True
+        self.memory = memory
+        self.report_path = report_path
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if report_path and not self._atexit_registered:
+            atexit.register(self._save_at_exit)
+            self._atexit_registered = True
+
+    def disable(self):
+        """
+        Stop recording. Recorded data stays available for report().
+        """
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        self.enabled = False
+
+    def reset(self):
+        self.stages = {}
+        self.counters = Counter()
+        self._memory_thread = None
+        self._started = datetime.now(timezone.utc)
+        self._start_time = time.perf_counter()
+        self._cprofile = None
+
+    def count(self, name, value=1):
+        """
+        Add `value` to the counter `name`.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as one call of stage `name`. Stages may be nested.
+
+        Peak memory is only traced for the stages of the thread that opened the outermost stage, since
+        resetting the process-wide tracemalloc peak from another thread would wipe its stages' peaks.
+        Allocations made by other threads still count towards those stages.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._local.__dict__.setdefault("stack", [])
+        frame = {"start": None, "peak": 0}
+        sampling = False
+        if self.memory and tracemalloc.is_tracing():
+            with self._lock:
+                if self._memory_thread is None:
+                    self._memory_thread = threading.get_ident()
+                sampling = self._memory_thread == threading.get_ident()
+        if sampling:
+            current, peak = tracemalloc.get_traced_memory()
+            for parent in stack:
+                parent["peak"] = max(parent["peak"], peak)
+            tracemalloc.reset_peak()
+            frame = {"start": current, "peak": current}
+        stack.append(frame)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            peak_bytes = None
+            if frame["start"] is not None and tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                frame["peak"] = max(frame["peak"], peak)
+                for parent in stack:
+                    parent["peak"] = max(parent["peak"], frame["peak"])
+                peak_bytes = frame["peak"] - frame["start"]
+            if sampling and not stack:
+                with self._lock:
+                    self._memory_thread = None
+            self._record(name, elapsed, peak_bytes)
+
+    def _record(self, name, elapsed, peak_bytes):
+        with self._lock:
+            stats = self.stages.setdefault(
+                name, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0, "peak_bytes": None}
+            )
+            stats["calls"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            if peak_bytes is not None:
+                stats["peak_bytes"] = max(stats["peak_bytes"] or 0, peak_bytes)
+
+    def report(self, top_functions=30):
+        """
+        Build the JSON-serializable report for the run so far.
+
+        Returns:
+            dict: Run metadata, per-stage statistics, counters, process peak RSS and,
+                  if enabled, the top cProfile functions by cumulative time.
+        """
+        with self._lock:
+            stages = {
+                name: {**stats, "mean_seconds": stats["total_seconds"] / stats["calls"]}
+                for name, stats in sorted(self.stages.items(), key=lambda x: -x[1]["total_seconds"])
+            }
+            counters = dict(self.counters)
+
+        report = {
+            "started": self._started.isoformat() if self._started else None,
+            "wall_seconds": time.perf_counter() - self._start_time if self._start_time else None,
+            "argv": sys.argv,
+            "stages": stages,
+            "counters": counters,
+            "peak_rss_bytes": _peak_rss_bytes(),
+        }
+        if self._cprofile:
+            report["cprofile"] = _top_functions(self._cprofile, top_functions)
+        return report
+
+    def save_report(self, path=None):
+        """
+        Write the report as JSON (and the raw cProfile stats next to it as <path>.prof).
+        """
+        path = path or self.report_path
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        if self._cprofile:
+            self._cprofile.dump_stats(f"{path}.prof")
+        print(f"Profiling report saved to {path}")
+
+    def _save_at_exit(self):
+        if self.enabled and self.report_path:
+            self.disable()
+            self.save_report()
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _top_functions(profile, limit):
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (file, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(file)}:{line}({function})",
+            "calls": calls,
+            "own_seconds": own,
+            "cumulative_seconds": cumulative,
+        })
+    return sorted(rows, key=lambda row: -row["cumulative_seconds"])[:limit]
+
+
+# Process-wide profiler used by all the instrumented modules
+PROFILER = Profiler()
+
+
+def profiled(name):
+    """
+    Decorator recording every call of the function as one call of stage `name`.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with PROFILER.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if os.environ.get("ANIME_NETWORK_PROFILE"):
+    PROFILER.enable(
+        memory=os.environ.get("ANIME_NETWORK_PROFILE_MEMORY") == "1",
+        cprofile=os.environ.get("ANIME_NETWORK_PROFILE_CPROFILE") == "1",
+        report_path=os.environ["ANIME_NETWORK_PROFILE"],
+    )
@@ -0,0 +1,342 @@
+'''
+Long-running query service over a saved character network.
+
+Loads the pickled network once, precomputes popularity, ranked relationships and communities,
+and answers JSON queries over HTTP (TCP or a Unix socket) from many threads at once. The network
+file is watched and hot-reloaded when it changes; queries in flight keep using the old snapshot.
+
+Endpoints (GET):
+    /health
+    /metrics                                  per-endpoint latency statistics
+    /popularity?character=<name>
+    /top_relationships?character=<name>&n=3
+    /neighbors?character=<name>
+    /shortest_path?source=<name>&target=<name>
+    /communities[?character=<name>]
+
+Usage:
+    python Service.py --network ./data/network.pkl --port 8765
+    python Service.py --network ./data/network.pkl --unix /tmp/anime_network.sock
+'''
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from Analytics import Analysis
+from Network import Anime_Network
+from data.Constants import NETWORK_FILE
+
+
+class QueryError(Exception):
+    """
+    A query that cannot be answered, with the HTTP status to answer it with.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class NetworkSnapshot:
+    """
+    Read-only view of one loaded network with everything the queries need precomputed.
+
+    Attributes:
+        graph (CSRGraph): The character graph (never mutated after loading).
+        popularity (Dict[str, float]): Sum of edge weights per character.
+        relationships (Dict[str, List[Tuple[str, float]]]): Neighbors per character, strongest first.
+        partition (Dict[str, int]): Community of each character.
+        communities (Dict[int, List[str]]): Members of each community.
+
+    Args:
+        workers (int): Process pool size for the community passes (1 runs them in-process).
+    """
+    def __init__(self, network, version, community_runs=1, workers=None):
+        self.network = network
+        self.graph = network.graph
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+
+        self.relationships = {}
+        self.popularity = {}
+        for character in self.graph.nodes:
+            edges = self.graph.neighbors(character)
+            self.relationships[character] = sorted(edges, key=lambda x: x[1], reverse=True)
+            self.popularity[character] = sum(weight for _, weight in edges)
+
+        self.partition = Analysis(None, network=network).detect_communities(runs=community_runs, workers=workers)
+        self.communities = {}
+        for character, community in self.partition.items():
+            self.communities.setdefault(community, []).append(character)
+
+    def character(self, name):
+        if name is None:
+            raise QueryError("Missing 'character' parameter.")
+        if name not in self.relationships:
+            raise QueryError(f"Character '{name}' not found in the network.", status=404)
+        return name
+
+
+class LatencyStats:
+    """
+    Thread-safe latency statistics for one endpoint, over all calls and the most recent `window` calls.
+    """
+    def __init__(self, window=1000):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.count += 1
+            self.errors += error
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.recent.append(seconds)
+
+    def summary(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            count, errors, total, slowest = self.count, self.errors, self.total_seconds, self.max_seconds
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else None
+
+        return {
+            "count": count,
+            "errors": errors,
+            "mean_ms": total / count * 1000 if count else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": slowest * 1000,
+        }
+
+
+class QueryService:
+    """
+    Holds the current NetworkSnapshot, hot-reloads it and answers queries against it.
+
+    Args:
+        network_file (str): Path of the pickled network to serve.
+        poll_interval (float): Seconds between checks of the network file for changes.
+        community_runs (int): Louvain passes in the consensus used for community queries.
+    """
+    def __init__(self, network_file=NETWORK_FILE, poll_interval=2.0, community_runs=1):
+        self.network_file = network_file
+        self.poll_interval = poll_interval
+        self.community_runs = community_runs
+        self.latency = {}
+        self.reloads = 0
+        self.snapshot = None
+        self._latency_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.reload()
+
+        self.routes = {
+            "/health": self.health,
+            "/metrics": self.metrics,
+            "/popularity": self.popularity,
+            "/top_relationships": self.top_relationships,
+            "/neighbors": self.neighbors,
+            "/shortest_path": self.shortest_path,
+            "/communities": self.communities,
+        }
+
+    # Loading
+
+    def reload(self, workers=None):
+        """
+        Load the network file into a new snapshot and swap it in.
+
+        Args:
+            workers (int): Process pool size for the community passes (1 runs them in-process).
+        """
+        version = os.stat(self.network_file).st_mtime_ns
+        network = Anime_Network.load_network(self.network_file)
+        snapshot = NetworkSnapshot(network, version, self.community_runs, workers)
+        # A single reference assignment, so readers see either the old or the new snapshot
+        self.snapshot = snapshot
+        self.reloads += 1
+        print(f"Serving {snapshot.graph.number_of_nodes()} characters from {self.network_file}")
+
+    def watch(self):
+        """
+        Start a background thread reloading the network whenever its file changes.
+        """
+        if self._watcher:
+            return
+
+        def loop():
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    if os.stat(self.network_file).st_mtime_ns != self.snapshot.version:
+                        # In-process: forking a pool while the HTTP threads run can deadlock the children
+                        self.reload(workers=1)
+                except Exception as e:
+                    # Keep serving the old snapshot, e.g. while the file is being rewritten
+                    print(f"Failed to reload {self.network_file}: {e}")
+
+        self._watcher = threading.Thread(target=loop, daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # Dispatch
+
+    def query(self, path, params):
+        """
+        Answer one query and record its latency.
+
+        Returns:
+            Tuple[int, dict]: HTTP status and JSON body.
+        """
+        start = time.perf_counter()
+        handler = self.routes.get(path)
+        snapshot = self.snapshot
+        error = False
+        try:
+            if handler is None:
+                raise QueryError(f"Unknown endpoint '{path}'.", status=404)
+            status, body = 200, handler(snapshot, params)
+        except QueryError as e:
+            status, body, error = e.status, {"error": str(e)}, True
+        except Exception as e:
+            status, body, error = 500, {"error": repr(e)}, True
+
+        with self._latency_lock:
+            stats = self.latency.setdefault(path if handler else "unknown", LatencyStats())
+        stats.record(time.perf_counter() - start, error)
+        return status, body
+
+    # Queries
+
+    def health(self, snapshot, params):
+        return {
+            "status": "ok",
+            "network_file": self.network_file,
+            "characters": snapshot.graph.number_of_nodes(),
+            "relationships": snapshot.graph.number_of_edges(),
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+        }
+
+    def metrics(self, snapshot, params):
+        with self._latency_lock:
+            endpoints = dict(self.latency)
+        return {path: stats.summary() for path, stats in endpoints.items()}
+
+    def popularity(self, snapshot, params):
+        character = snapshot.character(params.get("character"))
+        return {"character": character, "popularity": snapshot.popularity[character]}
+
+    def top_relationships(self, snapshot, params):
+        character = snapshot.character(params.get("character"))
+        try:
+            top_n = int(params.get("n", 3))
+        except ValueError:
+            raise QueryError("'n' must be an integer.")
+        if top_n < 0:
+            raise QueryError("'n' must not be negative.")
+        return {"character": character, "relationships": snapshot.relationships[character][:top_n]}
+
+    def neighbors(self, snapshot, params):
+        character = snapshot.character(params.get("character"))
+        return {"character": character, "neighbors": snapshot.relationships[character]}
+
+    def shortest_path(self, snapshot, params):
+        source = snapshot.character(params.get("source"))
+        target = snapshot.character(params.get("target"))
+        path = snapshot.graph.shortest_path(source, target)
+        if path is None:
+            raise QueryError(f"No path between '{source}' and '{target}'.", status=404)
+        return {"path": path, "length": len(path) - 1}
+
+    def communities(self, snapshot, params):
+        if "character" not in params:
+            return {"communities": snapshot.communities}
+        character = snapshot.character(params["character"])
+        community = snapshot.partition[character]
+        return {"character": character, "community": community, "members": snapshot.communities[community]}
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            status, body = service.query(parts.path, params)
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def address_string(self):
+            # Unix socket clients have no (host, port) address
+            return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(service, host="127.0.0.1", port=8765, unix_socket=None):
+    """
+    Serve queries until interrupted, on a Unix socket if one is given, else on host:port.
+    """
+    handler = make_handler(service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, handler)
+        print(f"Listening on unix socket {unix_socket}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        print(f"Listening on http://{host}:{server.server_address[1]}")
+
+    service.watch()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve queries over a saved character network.")
+    parser.add_argument("--network", default=NETWORK_FILE, help="Pickled network to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between checks for a changed network file")
+    parser.add_argument("--community-runs", type=int, default=1, help="Louvain passes in the community consensus")
+    args = parser.parse_args(argv)
+
+    service = QueryService(args.network, args.poll, args.community_runs)
+    serve(service, args.host, args.port, args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+'''
+Local stand-in for the Jikan API and fandom wikis.
+
+Serves recorded (or synthetic) Jikan episode pagination responses and fandom episode pages over
+HTTP on localhost, with injectable latency, rate limiting (429) and server errors, so the scrapers
+can be tested offline and their throughput, retries and concurrency benchmarked deterministically.
+
+Usage:
+    with StandInServer(fixtures_dir="./data/fixtures", latency=0.05) as server:
+        anime = Anime("Naruto", [["Naruto", 20]], api_url=server.api_url, wiki_url=server.wiki_url("naruto"))
+        anime.save_episodes("./data/episodes.csv")
+'''
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+JIKAN_ROUTE = re.compile(r"^/v4/anime/(\d+)/episodes$")
+WIKI_ROUTE = re.compile(r"^/([^/]+)/wiki/(.+)$")
+
+# Page layouts understood by Anime.get_episode_characters
+TABLE_LAYOUT = "table"  # Naruto: characters in the first column of a table
+LIST_LAYOUT = "list"    # Jujutsu Kaisen: list under "Characters in Order of Appearance"
+
+
+def render_episode_page(title, characters, layout=TABLE_LAYOUT):
+    """
+    Render a minimal fandom episode page listing the given characters.
+
+    Args:
+        title (str): The episode title.
+        characters (List[str]): Characters appearing in the episode, in order.
+        layout (str): TABLE_LAYOUT or LIST_LAYOUT.
+
+    Returns:
+        str: The HTML page.
+    """
+    names = [html.escape(character) for character in characters]
+    if layout == TABLE_LAYOUT:
+        rows = "".join(f'<tr><td><a href="/wiki/{name}">{name}</a></td><td>Debut</td></tr>' for name in names)
+        body = (
+            '<table class="headnote"><tbody><tr><td>Navigation</td></tr></tbody></table>'
+            f"<table><tbody>{rows}</tbody></table>"
+        )
+    elif layout == LIST_LAYOUT:
+        items = "".join(f'<li><a href="/wiki/{name}">{name}</a></li>' for name in names)
+        body = (
+            '<h2><span class="mw-headline" id="Characters_in_Order_of_Appearance">'
+            "Characters in Order of Appearance</span></h2>"
+            f"<ul>{items}</ul>"
+        )
+    else:
+        raise ValueError(f"Unknown page layout '{layout}'.")
+    return f"<html><head><title>{html.escape(title)}</title></head><body>{body}</body></html>"
+
+
+class StandInServer:
+    """
+    Threaded local HTTP server standing in for api.jikan.moe and fandom.com.
+
+    Responses come from the fixtures directory when a recording exists, otherwise from data
+    registered with add_series / add_episode_page / serve_anime.
+
+    Fixture layout:
+        <fixtures_dir>/jikan/<mal_id>/page_<n>.json
+        <fixtures_dir>/fandom/<slug>/<page>.html
+
+    Attributes:
+        latency (float): Seconds added to every response.
+        jitter (float): Extra uniformly random latency in [0, jitter] seconds (seeded).
+        error_rate (float): Probability of answering 500 instead of the real response.
+        rate_limit (int): Maximum requests per `rate_window` seconds before answering 429.
+        rate_window (float): Length of the rate limit window in seconds.
+        retry_after (float): Value of the Retry-After header sent with 429s.
+        fail_first (int): Number of initial requests per path answered with `fail_status`.
+        fail_status (int): Status code used for `fail_first` failures.
+        page_size (int): Episodes per page for synthetic Jikan responses.
+        stats (Counter): Requests per status code, plus total `bytes` served.
+    """
+    def __init__(self, fixtures_dir=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit=None, rate_window=1.0, retry_after=0.0, fail_first=0, fail_status=503,
+                 page_size=100, seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.page_size = page_size
+        self.stats = Counter()
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._path_hits = Counter()
+        self._series = {}
+        self._pages = {}
+        self._server = None
+        self._thread = None
+
+    # Registration
+
+    def add_series(self, mal_id, episodes):
+        """
+        Serve a series' episode list from the Jikan route.
+
+        Args:
+            mal_id (int): The MyAnimeList ID the series is served under.
+            episodes (List[dict]): Jikan episode objects (at least `mal_id` and `title`, optionally `filler`).
+        """
+        self._series[str(mal_id)] = list(episodes)
+
+    def add_episode_page(self, slug, page, title, characters, layout=TABLE_LAYOUT):
+        """
+        Serve a wiki episode page at /<slug>/wiki/<page>.
+        """
+        self._pages[(slug, page)] = render_episode_page(title, characters, layout)
+
+    def serve_anime(self, anime, mal_id, slug, title_links=True, layout=TABLE_LAYOUT, offset=0):
+        """
+        Serve a SyntheticAnime through both routes so a real Anime can scrape it.
+
+        Args:
+            anime (SyntheticAnime): The generated anime to serve.
+            mal_id (int): The MyAnimeList ID to serve it under.
+            slug (str): The wiki slug, see wiki_url.
+            title_links (bool): Page names from episode titles (Naruto) rather than Episode_<n> (Jujutsu Kaisen).
+            layout (str): TABLE_LAYOUT or LIST_LAYOUT.
+            offset (int): Episodes of earlier series, for later seasons numbered on from them.
+        """
+        from DataCollection import Anime
+
+        if not anime.all_episodes:
+            anime.fetch_all_episodes()
+        episodes = []
+        for ep in anime.all_episodes:
+            episodes.append({"mal_id": ep["episode_number"], "title": ep["title"], "filler": ep.get("filler", False)})
+            page = Anime.make_link(ep["title"]) if title_links else f"Episode_{offset + ep['episode_number']}"
+            self.add_episode_page(slug, page, ep["title"], ep["characters"], layout)
+        self.add_series(mal_id, episodes)
+
+    # Lifecycle
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_url(self):
+        """
+        Base URL to pass as `api_url` to Series / Anime.
+        """
+        return f"{self.url}/v4"
+
+    def wiki_url(self, slug):
+        """
+        Base URL to pass as `wiki_url` to Anime.
+        """
+        return f"{self.url}/{slug}/wiki/"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Request handling
+
+    def _fault(self, path):
+        """
+        Decide whether this request fails, and how. Returns a status code or None.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._path_hits[path] += 1
+            if self._path_hits[path] <= self.fail_first:
+                return self.fail_status
+            if self.rate_limit is not None:
+                while self._recent and now - self._recent[0] >= self.rate_window:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    return 429
+                self._recent.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 500
+            return None
+
+    def _delay(self):
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + extra
+
+    def _respond(self, handler, status, body, content_type):
+        data = body.encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            handler.send_header("Retry-After", str(self.retry_after))
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self._lock:
+            self.stats[status] += 1
+            self.stats["bytes"] += len(data)
+
+    def _handle(self, handler):
+        parts = urlsplit(handler.path)
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+
+        status = self._fault(handler.path)
+        if status is not None:
+            self._respond(handler, status, json.dumps({"status": status, "message": "Injected failure"}),
+                          "application/json")
+            return
+
+        jikan = JIKAN_ROUTE.match(parts.path)
+        wiki = WIKI_ROUTE.match(parts.path)
+        if jikan:
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            body = self._jikan_page(jikan.group(1), page)
+            content_type = "application/json"
+        elif wiki:
+            body = self._wiki_page(wiki.group(1), wiki.group(2))
+            content_type = "text/html; charset=utf-8"
+        else:
+            body = None
+
+        if body is None:
+            self._respond(handler, 404, json.dumps({"status": 404, "message": "Not Found"}), "application/json")
+        else:
+            self._respond(handler, 200, body, content_type)
+
+    def _fixture(self, *path):
+        if not self.fixtures_dir:
+            return None
+        # The path comes from the request: never serve anything outside the fixtures directory
+        root = os.path.realpath(self.fixtures_dir)
+        file_path = os.path.realpath(os.path.join(root, *path))
+        if os.path.commonpath([root, file_path]) != root or not os.path.isfile(file_path):
+            return None
+        with open(file_path, encoding="utf-8") as f:
+            return f.read()
+
+    def _jikan_page(self, mal_id, page):
+        recorded = self._fixture("jikan", mal_id, f"page_{page}.json")
+        if recorded is not None or mal_id not in self._series:
+            return recorded
+
+        episodes = self._series[mal_id]
+        start = (page - 1) * self.page_size
+        last_page = max(1, -(-len(episodes) // self.page_size))
+        return json.dumps({
+            "pagination": {"last_visible_page": last_page, "has_next_page": page < last_page},
+            "data": episodes[start:start + self.page_size],
+        })
+
+    def _wiki_page(self, slug, page):
+        recorded = self._fixture("fandom", slug, f"{page}.html")
+        if recorded is not None:
+            return recorded
+        return self._pages.get((slug, page))
+
+
+def record_fixtures(anime, fixtures_dir, limit=None):
+    """
+    Record live Jikan and fandom responses for an anime into a fixtures directory.
+
+    Args:
+        anime (Anime): The anime to record; its api_url and wiki_url are used as-is.
+        fixtures_dir (str): Directory to write the fixtures to.
+        limit (int): Limit the number of episode pages recorded.
+    """
+    from DataCollection import fetch
+
+    for series in anime.series_list:
+        page = 1
+        while True:
+            response = fetch(f"{series.get_url_template()}?page={page}", series.retries, series.backoff)
+            if response.status_code != 200:
+                break
+            _write(os.path.join(fixtures_dir, "jikan", str(series.mal_id), f"page_{page}.json"), response.text)
+            if not response.json().get("pagination", {}).get("has_next_page"):
+                break
+            page += 1
+
+    anime.fetch_all_episodes()
+    slug = urlsplit(anime.wiki_url).netloc.split(".")[0]
+    for ep in anime.get_episode_urls()[:limit]:
+        response = fetch(ep["url"], anime.retries, anime.backoff)
+        if response.status_code == 200:
+            page = ep["url"][len(anime.wiki_url):]
+            _write(os.path.join(fixtures_dir, "fandom", slug, f"{page}.html"), response.text)
+    print(f"Fixtures for {anime.name} recorded to {fixtures_dir}")
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
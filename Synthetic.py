@@ -0,0 +1,92 @@
+'''
+Synthetic anime data for offline testing and benchmarking.
+
+Generates episodes.csv files in the same format as Anime.save_episodes, with a configurable
+number of characters and episodes and a Zipf-like distribution of character appearances.
+'''
+import csv
+import numpy as np
+
+
+class SyntheticAnime:
+    """
+    Stand-in for Anime that generates its episodes instead of scraping them.
+
+    Character k (0-based, by popularity) appears with probability proportional to 1 / (k + 1) ** zipf_exponent,
+    so a handful of main characters show up in most episodes while a long tail appears rarely.
+
+    Attributes:
+        name (str): The name of the synthetic anime.
+        num_characters (int): Size of the character pool.
+        num_episodes (int): Number of episodes to generate.
+        cast_size (int): Mean number of characters per episode.
+        zipf_exponent (float): Skew of the appearance distribution (0 = uniform).
+        seed (int): Seed for the random generator, so the same parameters always give the same data.
+        include_filler (bool): Whether to include filler episodes, as for Anime.
+        filler_rate (float): Fraction of episodes flagged as filler.
+    """
+    def __init__(self, name="Synthetic", num_characters=100, num_episodes=200, cast_size=12,
+                 zipf_exponent=1.1, seed=0, include_filler=True, filler_rate=0.0):
+        self.name = name
+        self.num_characters = num_characters
+        self.num_episodes = num_episodes
+        self.cast_size = cast_size
+        self.zipf_exponent = zipf_exponent
+        self.seed = seed
+        self.include_filler = include_filler
+        self.filler_rate = filler_rate
+        self.all_episodes = []
+
+    def character_names(self):
+        width = len(str(self.num_characters))
+        return [f"Character {i + 1:0{width}d}" for i in range(self.num_characters)]
+
+    def fetch_all_episodes(self, debug=False):
+        """
+        Generate the episodes and the characters appearing in each, in order of appearance.
+        """
+        rng = np.random.default_rng(self.seed)
+        names = self.character_names()
+        ranks = np.arange(1, self.num_characters + 1, dtype=float)
+        probabilities = ranks ** -self.zipf_exponent
+        probabilities /= probabilities.sum()
+        # Separate stream, so the casts are the same whatever the filler rate
+        filler = np.random.default_rng([self.seed, 1]).random(self.num_episodes) < self.filler_rate
+
+        self.all_episodes = []
+        for episode_number in range(1, self.num_episodes + 1):
+            size = int(np.clip(rng.poisson(self.cast_size), 1, self.num_characters))
+            cast = rng.choice(self.num_characters, size=size, replace=False, p=probabilities)
+            self.all_episodes.append({
+                "series": self.name,
+                "episode_number": episode_number,
+                "title": f"{self.name} Episode {episode_number}",
+                "characters": [names[i] for i in cast],
+                "filler": bool(filler[episode_number - 1]),
+            })
+            if debug:
+                print(f"[DEBUG] {self.all_episodes[-1]}")
+
+    def save_episodes(self, csv_file_path="./data/episodes.csv", limit=None, debug_ep=False, debug_ch=False):
+        """
+        Save all generated episodes and characters to a CSV file.
+
+        Args:
+            csv_file_path (str): Path to the output CSV file.
+            limit (int): Limit the number of episodes written.
+        """
+        self.fetch_all_episodes(debug=debug_ep)
+        with open(csv_file_path, mode="w", newline="", encoding="utf-8") as file:
+            csv_writer = csv.writer(file)
+            csv_writer.writerow(["Episode", "Characters", "Filler"])
+
+            for ep in self.all_episodes[:limit]:
+                if debug_ch:
+                    print(f"[DEBUG] Characters in episode {ep['episode_number']}: {ep['characters']}")
+                csv_writer.writerow([f"Episode {ep['episode_number']}", ", ".join(ep["characters"]), int(ep["filler"])])
+
+        print(f"Data has been saved to {csv_file_path}")
+
+
+if __name__ == "__main__":
+    SyntheticAnime().save_episodes("./synthetic_episodes.csv")
@@ -1,16 +1,38 @@
-from DataCollection import Anime, Series
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import networkx as nx
+import numpy as np
+import Graphs
+from Analytics import Analysis
+from Appearances import AppearanceMatrix, popcount, table_popcount
+from BatchRunner import load_manifest, run_batch
+from Communities import consensus_partition, partition_modularity
+from DataCollection import Anime, Series, JIKAN_URL, fetch
+from Graphs import CSRGraph
+from Kernels import compute_kernels
 from Network import Anime_Network
+from Profiling import Profiler
+from Service import QueryService
+from StandInServer import StandInServer, LIST_LAYOUT
+from Synthetic import SyntheticAnime
 
 class Testing:
     """
     A class for debugging and visualizing outputs.
 
     Includes default example inputs or takes inputs to test on specific cases.
+    Pass the URLs of a StandInServer to run the scraper tests offline.
     """
-    def __init__(self):
+    def __init__(self, api_url=JIKAN_URL, wiki_url=None, backoff=1.0):
         # Example data for testing
-        self.test_series = Series("Jujutsu Kaisen", 40748)
-        self.test_anime = Anime("Jujutsu Kaisen", [["Jujutsu Kaisen", 40748], ["Jujutsu Kaisen Season 2", 51009]])
+        self.test_series = Series("Jujutsu Kaisen", 40748, api_url=api_url, backoff=backoff)
+        self.test_anime = Anime("Jujutsu Kaisen", [["Jujutsu Kaisen", 40748], ["Jujutsu Kaisen Season 2", 51009]],
+                                api_url=api_url, wiki_url=wiki_url, backoff=backoff)
 
     def test_fetch_episodes(self):
         print("[TEST] Testing fetch_episodes...")
@@ -79,11 +101,464 @@ class Testing:
         except Exception as e:
             print("[FAIL] make_link encountered an error:", e)
 
+def offline_server(**faults):
+    """
+    A StandInServer serving synthetic Jujutsu Kaisen seasons under their real MAL IDs. Start it with `with`.
+    """
+    server = StandInServer(**faults)
+    season_1 = SyntheticAnime("Jujutsu Kaisen", num_characters=30, num_episodes=24, seed=1, filler_rate=0.25)
+    season_2 = SyntheticAnime("Jujutsu Kaisen Season 2", num_characters=30, num_episodes=23, seed=2)
+    server.serve_anime(season_1, 40748, "jujutsu-kaisen", title_links=False, layout=LIST_LAYOUT)
+    server.serve_anime(season_2, 51009, "jujutsu-kaisen", title_links=False, layout=LIST_LAYOUT, offset=24)
+    return server
+
+
+def test_retry_on_failure():
+    print("[TEST] Testing retries on server errors...")
+    try:
+        with offline_server(fail_first=2) as server:
+            response = fetch(f"{server.api_url}/anime/40748/episodes?page=1", retries=3, backoff=0.01)
+            assert response.status_code == 200, f"Expected 200 after retries, got {response.status_code}"
+            assert server.stats[503] == 2, f"Expected 2 failed attempts, got {server.stats[503]}"
+        print("[PASS] Request succeeded after 2 injected failures.")
+    except Exception as e:
+        print("[FAIL] retries encountered an error:", e)
+
+
+def test_rate_limit():
+    print("[TEST] Testing retries on rate limits...")
+    try:
+        with offline_server(rate_limit=3, rate_window=0.2, retry_after=0.2) as server:
+            tester = Testing(api_url=server.api_url, wiki_url=server.wiki_url("jujutsu-kaisen"), backoff=0.01)
+            start = time.perf_counter()
+            tester.test_anime.save_episodes(csv_file_path="./test_episodes.csv", limit=10, workers=4)
+            elapsed = time.perf_counter() - start
+            assert server.stats[429] > 0, "The rate limit was never hit."
+            print(f"[PASS] Scraped 10 episodes in {elapsed:.2f}s through {server.stats[429]} rate-limited responses.")
+    except Exception as e:
+        print("[FAIL] rate limiting encountered an error:", e)
+
+
+def test_fixture_confinement():
+    print("[TEST] Testing that the stand-in only serves files from its fixtures directory...")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            fixtures = os.path.join(workdir, "fixtures")
+            os.makedirs(os.path.join(fixtures, "fandom", "naruto"))
+            with open(os.path.join(fixtures, "fandom", "naruto", "Episode_1.html"), "w", encoding="utf-8") as f:
+                f.write("<html>recorded</html>")
+            with open(os.path.join(workdir, "secret.html"), "w", encoding="utf-8") as f:
+                f.write("secret")
+
+            with StandInServer(fixtures_dir=fixtures) as server:
+                # http.client sends the path as is, without resolving the dot segments
+                connection = http.client.HTTPConnection(server.host, server.port)
+                statuses = {}
+                for path in ("/naruto/wiki/Episode_1", "/naruto/wiki/../../../secret"):
+                    connection.request("GET", path)
+                    response = connection.getresponse()
+                    statuses[path] = (response.status, response.read().decode("utf-8"))
+                connection.close()
+            assert statuses["/naruto/wiki/Episode_1"] == (200, "<html>recorded</html>"), "Fixture not served."
+            assert statuses["/naruto/wiki/../../../secret"][0] == 404, "A file outside the fixtures was served."
+        print("[PASS] Paths escaping the fixtures directory get a 404.")
+    except Exception as e:
+        print("[FAIL] fixture confinement encountered an error:", e)
+
+
+def test_filler_masking():
+    print("[TEST] Testing canon-only and full networks from one scrape...")
+    try:
+        # A fresh CSV every run, so preProcessing always scrapes through the stand-in
+        with offline_server() as server, tempfile.TemporaryDirectory() as workdir:
+            tester = Testing(api_url=server.api_url, wiki_url=server.wiki_url("jujutsu-kaisen"), backoff=0.01)
+            network = Anime_Network(tester.test_anime)
+            network.preProcessing(episodes_file=os.path.join(workdir, "episodes.csv"))
+            requests_made = sum(server.stats.values())
+            assert requests_made > 0, "Nothing was scraped."
+            assert any(network.episode_filler), "No filler episodes were recorded."
+
+            network.network(save=False, include_filler=False)
+            canon = network.anime_network.number_of_nodes()
+            start = time.perf_counter()
+            network.network(save=False, include_filler=True)
+            elapsed = time.perf_counter() - start
+            assert sum(server.stats.values()) == requests_made, "Switching filler modes fetched pages again."
+            assert network.anime_network.number_of_nodes() >= canon, "The full network lost characters."
+            print(f"[PASS] {sum(network.episode_filler)} filler episodes masked; switched networks in {elapsed:.3f}s.")
+    except Exception as e:
+        print("[FAIL] filler masking encountered an error:", e)
+
+
+def test_empty_canon_network():
+    print("[TEST] Testing a canon-only network with no character left...")
+    try:
+        # Every character appears three times, but only once in a canon episode
+        network = Anime_Network(None)
+        network.characters_episodes = AppearanceMatrix.from_dense(["A", "B"], [[1, 1, 1, 1], [1, 1, 1, 1]])
+        network.episode_filler = [True, True, True, False]
+        network.network(save=False)
+        full = network.graph
+        try:
+            network.network(save=False, include_filler=False)
+        except ValueError as e:
+            assert "canon" in str(e), f"Unclear error: {e}"
+        else:
+            raise AssertionError("An empty canon-only network was built.")
+        assert network.graph is full and network.include_filler, "The failed build replaced the network."
+
+        network.graph = CSRGraph.from_weight_matrix([], np.zeros((0, 0)))
+        assert network.max_cutoff_for_connected_graph() == (None, None), "Trimming no graph changed arity."
+        print("[PASS] An empty canon-only network raises a clear error and keeps the previous graph.")
+    except Exception as e:
+        print("[FAIL] empty canon-only network encountered an error:", e)
+
+
+def test_appearance_matrix():
+    print("[TEST] Testing the bit-packed appearances against the dictionary of lists...")
+    try:
+        # 70 episodes: more than one word, and a partly used last word
+        rng = np.random.default_rng(7)
+        dense = (rng.random((25, 70)) < 0.3).astype(np.uint8)
+        lists = {f"Character {i:02d}": row.tolist() for i, row in enumerate(dense)}
+        matrix = AppearanceMatrix.from_lists(lists)
+
+        assert dict(matrix.items()) == lists and list(matrix) == list(lists), "Mapping round-trip differs."
+        assert len(matrix) == len(lists) and "Character 03" in matrix and "Nobody" not in matrix, "Bad keys."
+        assert (matrix.to_dense() == dense).all(), "to_dense differs."
+        assert (AppearanceMatrix.from_dense(matrix.characters, matrix.to_dense()).words == matrix.words).all(), \
+            "from_dense(to_dense()) changed the words."
+        assert matrix.counts().tolist() == dense.sum(axis=1).tolist(), "Counts differ."
+        assert matrix.count("Character 05") == sum(lists["Character 05"]), "count differs."
+        assert matrix.shared_episodes("Character 01", "Character 02") == int(dense[1] @ dense[2]), \
+            "shared_episodes differs."
+
+        characters = ["Character 09", "Character 00", "Character 04"]
+        episodes = rng.random(70) < 0.5
+        selection = matrix.select(characters, episodes)
+        expected = {character: np.array(lists[character])[episodes].tolist() for character in characters}
+        assert dict(selection.items()) == expected and selection.num_episodes == episodes.sum(), "select differs."
+
+        # Every pair ANDed and counted with the lookup-table popcount used before numpy 2.0
+        words = matrix.words
+        pairs = table_popcount(words[:, None, :] & words[None, :, :]).sum(axis=-1, dtype=np.int64)
+        assert (table_popcount(words) == popcount(words)).all(), "The popcounts differ."
+        assert (matrix.co_occurrence() == pairs).all(), "co_occurrence differs from the popcount."
+        print("[PASS] Mapping, select, shared_episodes and co_occurrence match the unpacked data.")
+    except Exception as e:
+        print("[FAIL] appearance matrix encountered an error:", e)
+
+
+def test_kernel_conventions():
+    print("[TEST] Testing PMI and NPMI for characters never seen together...")
+    try:
+        # A and B always appear together, C never appears with either
+        characters = ["A", "B", "C"]
+        appearances = np.array([[1, 1, 1, 0, 0, 0], [1, 1, 1, 0, 0, 0], [0, 0, 0, 1, 1, 1]])
+        weights = compute_kernels(appearances, ("pmi", "npmi"))
+        assert weights["npmi"][0, 1] == 1.0, f"Expected NPMI 1 for A-B, got {weights['npmi'][0, 1]}"
+        assert weights["npmi"][0, 2] == -1.0, f"Expected NPMI -1 for A-C, got {weights['npmi'][0, 2]}"
+        assert weights["pmi"][0, 2] == -np.inf, f"Expected PMI -inf for A-C, got {weights['pmi'][0, 2]}"
+
+        network = Anime_Network(None)
+        network.characters_episodes = AppearanceMatrix.from_dense(characters, appearances)
+        network.network(trimmed=False, save=False, kernel="pmi")
+        assert network.graph.number_of_edges() == 1, "Pairs with -inf PMI should be left unconnected."
+        print("[PASS] Never-together pairs get NPMI -1 and no PMI edge.")
+    except Exception as e:
+        print("[FAIL] kernel conventions encountered an error:", e)
+
+
+def test_signed_kernels_end_to_end():
+    print("[TEST] Testing untrimmed PMI and NPMI networks through communities and the summary...")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            anime = SyntheticAnime("Signed Kernels", num_characters=40, num_episodes=60, seed=5)
+            network = Anime_Network(anime)
+            network.preProcessing(episodes_file=os.path.join(workdir, "episodes.csv"))
+            for kernel in ("pmi", "npmi"):
+                characters, incidence, _ = network.incidence_matrix()
+                assert (compute_kernels(incidence, (kernel,))[kernel] < 0).any(), f"No negative {kernel} to drop."
+                network.network(trimmed=False, save=False, kernel=kernel)
+                assert network.graph.number_of_edges() > 0, f"The {kernel} graph has no edges."
+                assert (network.graph.edges()[2] >= 0).all(), f"Negative {kernel} weights reached the graph."
+                analysis = Analysis(None, network=network)
+                summary = analysis.summary()
+                assert summary["communities"] > 0 and summary["modularity"] is not None, summary
+                assert min(analysis.popularity_score(character) for character in characters) >= 0, \
+                    f"Negative {kernel} popularity."
+        print("[PASS] PMI and NPMI networks keep only non-negative edges and run through Louvain.")
+    except Exception as e:
+        print("[FAIL] signed kernels encountered an error:", e)
+
+
+def test_csr_matches_networkx():
+    print("[TEST] Testing the CSR graph metrics against networkx, over several BFS blocks...")
+    block_words = Graphs.BLOCK_WORDS
+    try:
+        # One word per block, so the 200 sources are split over four blocks
+        Graphs.BLOCK_WORDS = 1
+        for seed in range(3):
+            expected = nx.connected_watts_strogatz_graph(200, 6, 0.1, seed=seed)
+            network = Anime_Network(None)
+            network.graph = CSRGraph.from_networkx(expected)
+            analysis = Analysis(None, network=network)
+            assert analysis.network_diameter() == nx.diameter(expected), "Diameters differ."
+            assert np.isclose(analysis.average_shortest_path_length(), nx.average_shortest_path_length(expected)), \
+                "Average shortest path lengths differ."
+            assert np.isclose(analysis.clustering_coefficient(), nx.average_clustering(expected)), \
+                "Clustering coefficients differ."
+            assert all(np.isclose(analysis.popularity_score(node), expected.degree(node, weight="weight"))
+                       for node in expected), "Popularity scores differ."
+            assert nx.is_frozen(network.anime_network), "The networkx view can be modified."
+
+            # A path graph added as a second component
+            split = nx.disjoint_union(expected, nx.path_graph(70))
+            graph = CSRGraph.from_networkx(split)
+            eccentricity, _, reached = graph.distance_profile()
+            for component in nx.connected_components(split):
+                subgraph = split.subgraph(component)
+                rows = [graph.index[node] for node in component]
+                assert eccentricity[rows].max() == nx.diameter(subgraph), "Component diameters differ."
+                assert (reached[rows] == len(component)).all(), "Reached counts differ."
+            assert sorted(map(sorted, graph.connected_components())) == \
+                   sorted(map(sorted, nx.connected_components(split))), "Connected components differ."
+        print("[PASS] Diameter, average shortest path, clustering and components match networkx.")
+    except Exception as e:
+        print("[FAIL] CSR graph metrics encountered an error:", e)
+    finally:
+        Graphs.BLOCK_WORDS = block_words
+
+
+def test_community_ensemble():
+    print("[TEST] Testing community ensembles, consensus and the per-graph cache...")
+    try:
+        # A single pass is still renumbered by community size
+        partition, stability = consensus_partition([{"a": 7, "b": 3, "c": 3}])
+        assert partition == {"a": 1, "b": 0, "c": 0}, f"Single partition not renumbered: {partition}"
+        assert set(stability.values()) == {1.0}, "A single pass should be fully stable."
+
+        # Passes that agree up to labels give that grouping back
+        passes = [{"a": 0, "b": 0, "c": 1, "d": 1, "e": 1}, {"a": 5, "b": 5, "c": 2, "d": 2, "e": 2}]
+        partition, stability = consensus_partition(passes)
+        assert partition == {"a": 1, "b": 1, "c": 0, "d": 0, "e": 0}, f"Unexpected consensus: {partition}"
+        assert set(stability.values()) == {1.0}, "Agreeing passes should be fully stable."
+
+        graph = nx.relaxed_caveman_graph(6, 8, 0.2, seed=1)
+        nx.set_edge_attributes(graph, 1.0, "weight")
+        network = Anime_Network(None)
+        network.graph = CSRGraph.from_networkx(graph)
+
+        # Same seed, same consensus, whatever the analysis object
+        first = Analysis(None, network=network).community_ensemble(runs=4, resolutions=(1.0, 2.0), workers=1)
+        second = Analysis(None, network=network).community_ensemble(runs=4, resolutions=(1.0, 2.0), workers=1)
+        assert first == second, "Seeded ensembles differ between runs."
+
+        # Modularity is reported at the resolution the partition was computed with
+        for resolution, result in first.items():
+            expected = partition_modularity(result["partition"], graph, resolution)
+            assert np.isclose(result["modularity"], expected), f"Wrong modularity at resolution {resolution}."
+
+        # Repeated calls are served from the cache until the graph changes
+        analysis = Analysis(None, network=network)
+        cached = analysis.community_ensemble(runs=4, workers=1)[1.0]
+        assert analysis.community_ensemble(runs=4, workers=1)[1.0] is cached, "Repeated call was not cached."
+        # A rebuilt graph with the same edges has the same fingerprint
+        network.graph = network.graph.threshold(1.0)
+        analysis.community_ensemble(runs=4, workers=1)
+        assert len(analysis._community_cache) == 1, "An identical graph missed the cache."
+        u, v = next(iter(graph.edges()))
+        graph[u][v]["weight"] = 2.0
+        network.graph = CSRGraph.from_networkx(graph)
+        analysis.community_ensemble(runs=4, workers=1)
+        assert len(analysis._community_cache) == 2, "A changed graph reused the cached communities."
+        print("[PASS] Ensembles are reproducible, consensus is renumbered and results are cached per graph.")
+    except Exception as e:
+        print("[FAIL] community ensemble encountered an error:", e)
+
+
+def test_profiler_memory_threads():
+    print("[TEST] Testing peak memory of a stage whose work spawns staged threads...")
+    profiler = Profiler()
+    try:
+        profiler.enable(memory=True)
+
+        def fetch_stage(_):
+            with profiler.stage("inner"):
+                return bytearray(1000)
+
+        with profiler.stage("outer"):
+            block = bytearray(50_000_000)
+            del block
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(fetch_stage, range(20)))
+        peak = profiler.stages["outer"]["peak_bytes"]
+        assert peak >= 50_000_000, f"The outer stage's peak was wiped by its threads: {peak} bytes"
+        assert profiler.stages["inner"]["calls"] == 20, "Thread stages were not recorded."
+        print(f"[PASS] Outer stage peak of {peak} bytes survived 20 threaded stages.")
+    except Exception as e:
+        print("[FAIL] profiler memory tracing encountered an error:", e)
+    finally:
+        profiler.disable()
+
+
+def test_manifest_clashes():
+    print("[TEST] Testing that manifests with clashing names are rejected...")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for names in (["Naruto", "Naruto"], ["Naruto!", "naruto"]):
+                path = os.path.join(workdir, "manifest.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump([{"name": name, "series": [["Naruto", 20]]} for name in names], f)
+                try:
+                    load_manifest(path)
+                except ValueError:
+                    continue
+                raise AssertionError(f"{names} were accepted although they share an output folder.")
+        print("[PASS] Duplicate names and clashing slugs are rejected.")
+    except Exception as e:
+        print("[FAIL] manifest validation encountered an error:", e)
+
+
+def test_batch_refresh():
+    print("[TEST] Testing batch runs, reruns from the cache and refreshes...")
+    try:
+        with offline_server() as server, tempfile.TemporaryDirectory() as workdir:
+            entries = [{"name": "Jujutsu Kaisen", "series": [["Jujutsu Kaisen", 40748], ["Jujutsu Kaisen Season 2", 51009]],
+                        "api_url": server.api_url, "wiki_url": server.wiki_url("jujutsu-kaisen"), "backoff": 0.01}]
+            episodes_file = os.path.join(workdir, "jujutsu_kaisen", "episodes.csv")
+
+            def run(refresh):
+                before = server.stats[200]
+                rows = run_batch(entries, workdir, workers=1, refresh=refresh)
+                assert rows[0]["status"] == "ok", f"The batch failed: {rows[0]['error']}"
+                with open(episodes_file, encoding="utf-8") as f:
+                    return server.stats[200] - before, f.read()
+
+            scraped, first = run(refresh=False)
+            assert scraped == 2 + 47, f"Expected 2 episode lists and 47 pages, fetched {scraped}"
+            assert run(refresh=False) == (0, first), "A rerun fetched pages again or rewrote episodes.csv."
+
+            # A new episode airs in season 2
+            listing = fetch(f"{server.api_url}/anime/51009/episodes?page=1").json()["data"]
+            server.add_series(51009, listing + [{"mal_id": 24, "title": "New Episode", "filler": False}])
+            server.add_episode_page("jujutsu-kaisen", "Episode_48", "New Episode", ["Character 01", "Character 02"],
+                                    LIST_LAYOUT)
+            scraped, refreshed = run(refresh=True)
+            assert "Episode 48," in refreshed, "The refresh did not pick up the new episode."
+            assert scraped == 2 + 1, f"Expected 2 episode lists and the new page, fetched {scraped}"
+        print("[PASS] Reruns come from the cache and a refresh fetched only the lists and the new episode.")
+    except Exception as e:
+        print("[FAIL] batch runs encountered an error:", e)
+
+
+def _saved_network(workdir, num_characters, seed):
+    anime = SyntheticAnime(f"Service Test {seed}", num_characters=num_characters, num_episodes=40, seed=seed)
+    network = Anime_Network(anime)
+    network.preProcessing(episodes_file=os.path.join(workdir, f"episodes_{seed}.csv"))
+    network.network(save=False)
+    path = os.path.join(workdir, f"network_{seed}.pkl")
+    network.save_network(path)
+    return network, path
+
+
+def test_query_service():
+    print("[TEST] Testing the query service endpoints and hot reload...")
+    service = None
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            network, path = _saved_network(workdir, 20, seed=3)
+            service = QueryService(path, poll_interval=0.05)
+            graph = network.graph
+            character = max(graph.nodes, key=lambda node: len(graph.neighbors(node)))
+            far = graph.nodes[int(np.argmax(graph.bfs(graph.index[character])[0]))]
+
+            status, body = service.query("/health", {})
+            assert status == 200 and body["characters"] == graph.number_of_nodes(), f"Bad health: {body}"
+            status, body = service.query("/popularity", {"character": character})
+            expected = sum(weight for _, weight in graph.neighbors(character))
+            assert status == 200 and np.isclose(body["popularity"], expected), f"Bad popularity: {body}"
+            status, body = service.query("/top_relationships", {"character": character, "n": "2"})
+            weights = [weight for _, weight in body["relationships"]]
+            assert status == 200 and len(weights) == 2 and weights == sorted(weights, reverse=True), body
+            status, body = service.query("/neighbors", {"character": character})
+            assert status == 200 and len(body["neighbors"]) == len(graph.neighbors(character)), body
+            status, body = service.query("/shortest_path", {"source": character, "target": far})
+            assert status == 200 and body["path"] == graph.shortest_path(character, far), body
+            status, body = service.query("/communities", {"character": character})
+            assert status == 200 and character in body["members"], body
+
+            # Bad arguments are answered with an error rather than a guess
+            for path_, params, expected_status in [
+                ("/top_relationships", {"character": character, "n": "-1"}, 400),
+                ("/top_relationships", {"character": character, "n": "two"}, 400),
+                ("/popularity", {}, 400),
+                ("/popularity", {"character": "Nobody"}, 404),
+                ("/nowhere", {}, 404),
+            ]:
+                status, body = service.query(path_, params)
+                assert status == expected_status and "error" in body, f"{path_} {params} gave {status} {body}"
+            metrics = service.query("/metrics", {})[1]
+            assert metrics["/top_relationships"]["errors"] == 2, f"Errors not counted: {metrics}"
+
+            # Overwriting the network file swaps in a new snapshot
+            _, new_path = _saved_network(workdir, 30, seed=4)
+            os.replace(new_path, path)
+            service.watch()
+            deadline = time.time() + 30
+            while service.reloads < 2 and time.time() < deadline:
+                time.sleep(0.05)
+            assert service.reloads == 2, "The changed network file was not reloaded."
+            status, body = service.query("/health", {})
+            assert body["characters"] != graph.number_of_nodes(), "Still serving the old network."
+        print("[PASS] Endpoints answer correctly, reject bad arguments and the network is hot-reloaded.")
+    except Exception as e:
+        print("[FAIL] query service encountered an error:", e)
+    finally:
+        if service:
+            service.stop()
+
+
 if __name__ == "__main__":
+    if "--offline" in sys.argv:
+        # Same tests against a local stand-in of api.jikan.moe and fandom.com
+        with offline_server(latency=0.01) as server:
+            tester = Testing(api_url=server.api_url, wiki_url=server.wiki_url("jujutsu-kaisen"))
+            tester.test_fetch_episodes()
+            tester.test_fetch_all_episodes()
+            tester.test_get_episode_urls()
+            tester.test_get_episode_characters()
+            tester.test_save_episodes()
+            tester.test_make_link()
+        test_retry_on_failure()
+        test_rate_limit()
+        test_fixture_confinement()
+        test_filler_masking()
+        test_empty_canon_network()
+        test_appearance_matrix()
+        test_kernel_conventions()
+        test_signed_kernels_end_to_end()
+        test_csr_matches_networkx()
+        test_community_ensemble()
+        test_profiler_memory_threads()
+        test_manifest_clashes()
+        test_batch_refresh()
+        test_query_service()
+        sys.exit()
+
     tester = Testing()
     tester.test_fetch_episodes()
     tester.test_fetch_all_episodes()
     tester.test_get_episode_urls()
     tester.test_get_episode_characters()
     tester.test_save_episodes()
-    tester.test_make_link()
\ No newline at end of file
+    tester.test_make_link()
+    test_kernel_conventions()
+    test_csr_matches_networkx()
+    test_community_ensemble()
+    test_profiler_memory_threads()
+    test_manifest_clashes()
+    test_query_service()
+    test_signed_kernels_end_to_end()
+    test_empty_canon_network()
+    test_appearance_matrix()
@@ -0,0 +1,120 @@
+'''
+Visualization layer: interactive PyVis pages and matplotlib plots of the network.
+
+Kept apart from the analysis core so that loading a network and computing metrics never imports
+matplotlib or pyvis; Anime_Network and Analysis import this module on first use.
+'''
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+from pyvis.network import Network
+
+
+def display_network(graph, min_edge=0, output_file="character_network.html"):
+    """
+    Visualize the character relationship network interactively using PyVis.
+
+    Args:
+        graph (nx.Graph): The character network.
+        min_edge (float): The minimum weight for edges to be displayed.
+        output_file (str): The filename for saving the HTML visualization.
+    """
+    # Create a new PyVis network
+    net = Network(notebook=False, cdn_resources="remote", height="750px", width="100%", bgcolor="#222222", font_color="white",
+                  select_menu=True, filter_menu=True)
+
+    # Set physics layout
+    net.barnes_hut()
+
+    # Filter edges by the minimum weight
+    filtered_edges = [
+        (u, v, d) for u, v, d in graph.edges(data=True) if d["weight"] >= min_edge
+    ]
+
+    # Add nodes and edges
+    for u, v, data in filtered_edges:
+        # Add nodes with titles
+        net.add_node(u, label=u, title=f"{u} (Node)")
+        net.add_node(v, label=v, title=f"{v} (Node)")
+
+        # Add edges with weights as labels
+        net.add_edge(u, v, value=data["weight"], label=f"Weight: {data['weight']:.2f}")
+
+    # Map neighbors to node hover data
+    neighbor_map = net.get_adj_list()
+    for node in net.nodes:
+        node["title"] += " Neighbors:<br>" + "<br>".join(neighbor_map[node["id"]])
+        node["value"] = len(neighbor_map[node["id"]])  # Set node size based on connections
+
+    # Display the network
+    net.save_graph(output_file)
+    print(f"Network visualization saved to {output_file}. Open it in a browser to view.")
+
+
+def display_relationship(characters_episodes):
+    """
+    Visualize the relationship between characters and their appearances across episodes using a heatmap.
+    """
+    # Step 1: Extract characters and their binary appearance data
+    data = characters_episodes
+
+    characters = list(data.keys())
+    episodes = range(1, len(next(iter(data.values()))) + 1)
+    matrix = np.array([data[char] for char in characters])
+
+    # Step 2: Plot the heatmap
+    fig, ax = plt.subplots(figsize=(15, 12))
+    im = ax.imshow(matrix, cmap="Blues", aspect="auto")
+
+    # Set ticks and labels
+    ax.set_xticks(np.arange(len(episodes)))
+    ax.set_yticks(np.arange(len(characters)))
+    ax.set_xticklabels([f"{ep}" for ep in episodes], fontsize=8)
+    ax.set_yticklabels(characters, fontsize=6)
+
+    # Rotate the tick labels for better readability
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
+
+    # Add a colorbar
+    plt.colorbar(im, label="Appearance (1 = Present, 0 = Absent)")
+
+    # Set titles and labels
+    plt.title("Character Appearances Across Episodes", fontsize=14)
+    plt.xlabel("Episodes", fontsize=12)
+    plt.ylabel("Characters", fontsize=12)
+
+    # Adjust layout for better spacing
+    plt.tight_layout()
+
+    # Show the heatmap
+    plt.show()
+
+
+def visualize_communities(graph, partition):
+    """
+    Draw the network with each character colored by its community.
+
+    Args:
+        graph (nx.Graph): The character network.
+        partition (Dict[str, int]): Community index for each character.
+    """
+    # Assign colors to nodes based on their community
+    pos = nx.spring_layout(graph)  # Generate a layout for the graph
+    cmap = plt.get_cmap("viridis")
+    communities = set(partition.values())
+    colors = {node: cmap(community / max(communities)) for node, community in partition.items()}
+
+    # Draw the network with node colors based on communities
+    plt.figure(figsize=(15, 15))
+    nx.draw(
+        graph,
+        pos,
+        node_color=[colors[node] for node in graph.nodes()],
+        with_labels=True,
+        node_size=500,
+        font_size=8,
+        edge_color="gray",
+    )
+
+    plt.title("Louvain Community Detection", fontsize=16)
+    plt.show()